@@ -1,3 +1,4 @@
 VERSION = "@VERSION@"
 APP_ID = "@APP-ID@"
 APP_ICON = "@APP-ICON@"
+PKGDATADIR = "@PKGDATADIR@"
@@ -1,2 +1,21 @@
-from .async_utils import AsyncWorker, async_job_finished, run_in_thread, threaded
+from .async_utils import (
+    AsyncWorker,
+    Priority,
+    async_job_finished,
+    cancel_async_jobs,
+    run_in_thread,
+    threaded,
+    worker_pool,
+)
+from .paginated_model import PaginatedListModel
 from .remote_content import RemoteImage
+from .stale_while_revalidate import StaleWhileRevalidate
+
+
+def __getattr__(name: str):
+    # Importing requests takes a while, so the HTTP module is only loaded on first use
+    if name == "get_http_session":
+        from .http import get_http_session
+
+        return get_http_session
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
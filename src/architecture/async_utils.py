@@ -5,10 +5,124 @@
 
 from __future__ import annotations
 
-from threading import Thread
+import os
+import traceback
+from collections import deque
+from enum import IntEnum
+from threading import Condition, Thread
 from typing import Callable
+from weakref import WeakKeyDictionary, ref
 
-from gi.repository import Gio, GLib, GObject
+from gi.repository import Gio, GLib, GObject, Gtk
+
+
+class Priority(IntEnum):
+    """Worker pool lanes, served strictly in this order."""
+
+    VISIBLE = 0
+    DEFAULT = 1
+    PREFETCH = 2
+
+
+class WorkerPool:
+    """A bounded set of worker threads shared by every background job in Tanuki.
+
+    Jobs are queued into one FIFO lane per `Priority`, so work for what is
+    currently on screen never waits behind prefetching.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._max_workers = max(1, max_workers)
+        self._lanes = {priority: deque() for priority in Priority}
+        self._condition = Condition()
+        self._n_workers = 0
+        self._n_idle = 0
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def set_max_workers(self, max_workers: int) -> None:
+        with self._condition:
+            self._max_workers = max(1, max_workers)
+            self._spawn_workers_if_needed()
+            self._condition.notify_all()
+
+    def submit(
+        self,
+        func: Callable,
+        args: tuple = (),
+        kwargs: dict | None = None,
+        priority: Priority = Priority.DEFAULT,
+    ) -> tuple[Callable, tuple, dict]:
+        job = (func, args, kwargs or {})
+        with self._condition:
+            self._lanes[priority].append(job)
+            self._spawn_workers_if_needed()
+            self._condition.notify()
+        return job
+
+    def promote(self, job: tuple[Callable, tuple, dict], priority: Priority) -> None:
+        """Move a queued job up to the `priority` lane. Jobs already running are left alone."""
+        with self._condition:
+            for lane_priority, lane in self._lanes.items():
+                if lane_priority <= priority:
+                    continue
+
+                for index, queued_job in enumerate(lane):
+                    if queued_job is job:
+                        del lane[index]
+                        self._lanes[priority].append(job)
+                        return
+
+    def queue_depths(self) -> dict[Priority, int]:
+        with self._condition:
+            return {priority: len(lane) for priority, lane in self._lanes.items()}
+
+    def _spawn_workers_if_needed(self) -> None:
+        queued = sum(len(lane) for lane in self._lanes.values())
+        while self._n_idle < queued and self._n_workers < self._max_workers:
+            self._n_workers += 1
+            self._n_idle += 1
+            Thread(target=self._work, daemon=True).start()
+
+    def _next_job(self) -> tuple[Callable, tuple, dict] | None:
+        for lane in self._lanes.values():
+            if lane:
+                return lane.popleft()
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while (job := self._next_job()) is None:
+                    if self._n_workers > self._max_workers:
+                        self._n_workers -= 1
+                        self._n_idle -= 1
+                        return
+                    self._condition.wait()
+                self._n_idle -= 1
+
+            func, args, kwargs = job
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                traceback.print_exc()
+
+            with self._condition:
+                self._n_idle += 1
+
+
+def _get_default_max_workers() -> int:
+    try:
+        # Unset, empty or 0 all mean the default
+        max_workers = int(os.environ.get("TANUKI_MAX_WORKERS") or 0)
+    except ValueError:
+        max_workers = 0
+    return max_workers or min(8, (os.cpu_count() or 1) + 4)
+
+
+worker_pool = WorkerPool(_get_default_max_workers())
 
 
 class AsyncWorker(GObject.Object):
@@ -17,14 +131,22 @@ class AsyncWorker(GObject.Object):
         *args,
         operation: Callable,
         callback: Callable[[AsyncWorker, Gio.Task, None], None] = None,
+        priority: Priority = Priority.DEFAULT,
+        cancellable: Gio.Cancellable | None = None,
         **kwargs,
     ):
         super().__init__()
         self.operation = operation
         self.callback = callback
+        self.priority = priority
+        self.cancellable = cancellable
         self.data = {"args": args, "kwargs": kwargs}
+        self._job = None
 
     def _thread_callback(self, task, worker, *_):
+        if task.return_error_if_cancelled():
+            return
+
         try:
             result = self.operation(*self.data["args"], **self.data["kwargs"])
         except Exception as e:
@@ -33,8 +155,14 @@ class AsyncWorker(GObject.Object):
             task.return_value(result)
 
     def start(self):
-        task = Gio.Task.new(self, None, self.callback, None)
-        task.run_in_thread(self._thread_callback)
+        task = Gio.Task.new(self, self.cancellable, self.callback, None)
+        self._job = worker_pool.submit(self._thread_callback, (task, self), priority=self.priority)
+
+    def promote(self, priority: Priority) -> None:
+        """Raise the priority of the job, if it's still waiting in the queue."""
+        if self._job is not None and priority < self.priority:
+            worker_pool.promote(self._job, priority)
+            self.priority = priority
 
     def finish(self, result):
         if Gio.Task.is_valid(result, self):
@@ -48,26 +176,77 @@ class AsyncWorker(GObject.Object):
             raise RuntimeError("Gio.Task.is_valid() returned False")
 
 
+# owner -> {job name: cancellable of its latest run}
+_pending_jobs: WeakKeyDictionary[object, dict[str, Gio.Cancellable]] = WeakKeyDictionary()
+
+
+def _cancel_jobs(_owner: GObject.Object, jobs: dict[str, Gio.Cancellable]) -> None:
+    for cancellable in jobs.values():
+        cancellable.cancel()
+    jobs.clear()
+
+
+def _replace_job(owner: object, name: str) -> Gio.Cancellable:
+    jobs = _pending_jobs.get(owner)
+    if jobs is None:
+        jobs = _pending_jobs[owner] = {}
+        if isinstance(owner, Gtk.Widget):
+            owner.connect("destroy", _cancel_jobs, jobs)
+
+    if (previous := jobs.get(name)) is not None:
+        previous.cancel()
+
+    jobs[name] = cancellable = Gio.Cancellable()
+    return cancellable
+
+
+def cancel_async_jobs(owner: object, name: str | None = None) -> None:
+    """Cancel the pending `async_job_finished` jobs of `owner`, or only `name`."""
+    jobs = _pending_jobs.get(owner, {})
+    if name is None:
+        _cancel_jobs(owner, jobs)
+    elif (cancellable := jobs.pop(name, None)) is not None:
+        cancellable.cancel()
+
+
 def async_job_finished(func: Callable):
+    """Run `op` in the worker pool and pass its result to the decorated method.
+
+    Calling the method again cancels the previous run, and so does the owner
+    widget being destroyed. Cancelled jobs are dropped from the queue, and
+    their late results are never delivered.
+    """
+
     def wrapper(self, op: Callable, *args, **kwargs):
         direct_args = kwargs.pop("direct_args", ())
+        priority = kwargs.pop("priority", Priority.DEFAULT)
+        external_cancellable = kwargs.pop("cancellable", None)
+
+        cancellable = _replace_job(self, func.__name__)
+        if external_cancellable is not None:
+            external_cancellable.connect("cancelled", lambda *_: cancellable.cancel())
+
+        owner = ref(self)
 
         def cb(w, r, _):
-            func(self, w.finish(r), *direct_args)
+            if cancellable.is_cancelled() or (self_ := owner()) is None:
+                return
+            func(self_, w.finish(r), *direct_args)
 
-        AsyncWorker(*args, operation=op, callback=cb, **kwargs).start()
+        AsyncWorker(
+            *args, operation=op, callback=cb, priority=priority, cancellable=cancellable, **kwargs
+        ).start()
 
     return wrapper
 
 
 def threaded(func: Callable):
     def wrapper(*args, **kwargs):
-        thread = Thread(target=func, args=args, kwargs=kwargs)
-        thread.start()
+        worker_pool.submit(func, args, kwargs)
         return None
 
     return wrapper
 
 
-def run_in_thread(func: Callable, *args, **kwargs):
-    Gio.Task().run_in_thread(lambda *_: func(*args, **kwargs))
+def run_in_thread(func: Callable, *args, priority: Priority = Priority.DEFAULT, **kwargs):
+    worker_pool.submit(func, args, kwargs, priority=priority)
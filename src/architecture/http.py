@@ -0,0 +1,118 @@
+# http.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from tanuki.architecture.async_utils import worker_pool
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = Lock()
+
+
+class RevalidatingAdapter(HTTPAdapter):
+    """Revalidate repeated API GET requests with their ETag.
+
+    When the server answers 304 Not Modified, the previous response is
+    replayed, so unchanged resources cost only the headers.
+    """
+
+    MAX_ENTRIES = 256
+    MAX_BODY_SIZE = 1024 * 1024
+
+    def __init__(self, path_prefix: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._path_prefix = path_prefix
+        # (url, credentials hash) -> (etag, status code, headers, body)
+        self._responses: OrderedDict[tuple[str, str], tuple] = OrderedDict()
+        self._lock = Lock()
+
+    def _get_cache_key(self, request: requests.PreparedRequest) -> tuple[str, str]:
+        # Responses depend on who is asking, so never replay them to another account
+        credentials = "".join(
+            request.headers.get(header, "") for header in ("PRIVATE-TOKEN", "Authorization")
+        )
+        return request.url, hashlib.sha256(credentials.encode()).hexdigest()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if (
+            request.method != "GET"
+            or kwargs.get("stream")
+            or "If-None-Match" in request.headers
+            or not urlparse(request.url).path.startswith(self._path_prefix)
+        ):
+            return super().send(request, **kwargs)
+
+        key = self._get_cache_key(request)
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+
+        if cached is not None:
+            request.headers["If-None-Match"] = cached[0]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            return self._replay(cached, response)
+
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag and len(response.content) <= self.MAX_BODY_SIZE:
+            with self._lock:
+                self._responses[key] = (etag, 200, dict(response.headers), response.content)
+                if len(self._responses) > self.MAX_ENTRIES:
+                    self._responses.popitem(last=False)
+
+        return response
+
+    def _replay(self, cached: tuple, not_modified: requests.Response) -> requests.Response:
+        _, status_code, headers, body = cached
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        response.headers.update(
+            (name, value)
+            for name, value in not_modified.headers.items()
+            if name.lower() not in ("content-length", "content-encoding", "transfer-encoding")
+        )
+        response._content = body
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.connection = not_modified.connection
+        response.elapsed = not_modified.elapsed
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+def get_http_session(url: str) -> requests.Session:
+    """Get the keep-alive session shared by every request to the host of `url`.
+
+    Reusing it lets each request after the first skip the TCP and TLS handshake.
+    """
+    parsed_url = urlparse(url)
+    origin = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    with _sessions_lock:
+        if origin not in _sessions:
+            session = requests.Session()
+            # Every worker thread may hold a connection to the same host at once
+            adapter = RevalidatingAdapter(
+                "/api/", pool_connections=1, pool_maxsize=worker_pool.max_workers
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[origin] = session
+
+        return _sessions[origin]
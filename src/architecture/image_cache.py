@@ -0,0 +1,254 @@
+# image_cache.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from contextlib import suppress
+from threading import Lock, Timer
+from typing import Hashable
+
+from gi.repository import Gdk, GLib
+
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+def _get_max_age(headers) -> int:
+    cache_control = headers.get("Cache-Control", "")
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0
+    if match := re.search(r"max-age=(\d+)", cache_control):
+        return int(match.group(1))
+    return DEFAULT_MAX_AGE
+
+
+class DiskImageCache:
+    """Content-addressed on-disk image cache with LRU eviction.
+
+    Images are stored by the SHA-256 of their content, and a small JSON index
+    maps URLs to blobs along with the validators needed for revalidation.
+    Fresh entries are served without touching the network at all.
+    """
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        self._directory = directory
+        self._max_size = max_size
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock = Lock()
+        self._save_timer = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict[str, dict]:
+        try:
+            with open(self._index_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        with self._lock:
+            self._save_timer = None
+            serialized_index = json.dumps(self._index)
+
+        temp_path = self._index_path + ".tmp"
+        with open(temp_path, "w") as file:
+            file.write(serialized_index)
+        os.replace(temp_path, self._index_path)
+
+    def _schedule_save(self) -> None:
+        if self._save_timer is None:
+            self._save_timer = Timer(2, self._save_index)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _get_blob_path(self, digest: str) -> str:
+        return os.path.join(self._directory, digest[:2], digest)
+
+    def _read_blob(self, url: str) -> bytes | None:
+        entry = self._index[url]
+        try:
+            with open(self._get_blob_path(entry["digest"]), "rb") as file:
+                content = file.read()
+        except OSError:
+            del self._index[url]
+            return None
+
+        entry["last_used"] = time.time()
+        self._schedule_save()
+        return content
+
+    def get_fresh(self, url: str) -> bytes | None:
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None or entry["expires"] < time.time():
+                return None
+            return self._read_blob(url)
+
+    def get_conditional_headers(self, url: str) -> dict[str, str]:
+        with self._lock:
+            entry = self._index.get(url, {})
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidate(self, url: str, headers) -> bytes | None:
+        """Mark a cached entry fresh again after a 304 Not Modified response."""
+        with self._lock:
+            if url not in self._index:
+                return None
+
+            self._index[url]["expires"] = time.time() + _get_max_age(headers)
+            return self._read_blob(url)
+
+    def store(self, url: str, content: bytes, headers) -> None:
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._get_blob_path(digest)
+
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            temp_path = f"{blob_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, blob_path)
+
+        with self._lock:
+            now = time.time()
+            previous = self._index.get(url)
+            self._index[url] = {
+                "digest": digest,
+                "size": len(content),
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "expires": now + _get_max_age(headers),
+                "last_used": now,
+            }
+            if previous is not None and previous["digest"] != digest:
+                # The image at this URL changed, nothing points to the old content anymore
+                self._remove_blob_if_unused(previous["digest"])
+            self._evict()
+            self._schedule_save()
+
+    def _evict(self) -> None:
+        blob_sizes = {entry["digest"]: entry["size"] for entry in self._index.values()}
+        total_size = sum(blob_sizes.values())
+        if total_size <= self._max_size:
+            return
+
+        for url in sorted(self._index, key=lambda url: self._index[url]["last_used"]):
+            digest = self._index.pop(url)["digest"]
+            if not self._remove_blob_if_unused(digest):
+                continue
+
+            total_size -= blob_sizes[digest]
+            if total_size <= self._max_size:
+                break
+
+    def _remove_blob_if_unused(self, digest: str) -> bool:
+        """Delete a blob unless an entry still points to it. Returns whether it was deleted."""
+        if any(entry["digest"] == digest for entry in self._index.values()):
+            return False
+
+        with suppress(OSError):
+            os.remove(self._get_blob_path(digest))
+        return True
+
+
+class TextureCache:
+    """In-memory LRU cache of decoded textures, bounded by their size in bytes.
+
+    Textures pinned by an image that is still displayed are never evicted.
+    """
+
+    BYTES_PER_PIXEL = 4
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._textures: OrderedDict[Hashable, Gdk.Texture] = OrderedDict()
+        self._pins = Counter()
+        self._lock = Lock()
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_texture_size(self, texture: Gdk.Texture) -> int:
+        return texture.get_width() * texture.get_height() * self.BYTES_PER_PIXEL
+
+    def get(self, key: Hashable) -> Gdk.Texture | None:
+        with self._lock:
+            texture = self._textures.get(key)
+            if texture is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._textures.move_to_end(key)
+            return texture
+
+    def peek(self, key: Hashable) -> Gdk.Texture | None:
+        """Like `get`, but without counting a hit or a miss."""
+        with self._lock:
+            texture = self._textures.get(key)
+            if texture is not None:
+                self._textures.move_to_end(key)
+            return texture
+
+    def put(self, key: Hashable, texture: Gdk.Texture) -> None:
+        with self._lock:
+            if key in self._textures:
+                self.size -= self._get_texture_size(self._textures.pop(key))
+
+            self._textures[key] = texture
+            self.size += self._get_texture_size(texture)
+            self._evict()
+
+    def pin(self, key: Hashable) -> None:
+        with self._lock:
+            self._pins[key] += 1
+
+    def unpin(self, key: Hashable) -> None:
+        with self._lock:
+            self._pins[key] -= 1
+            if self._pins[key] <= 0:
+                del self._pins[key]
+            self._evict()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "count": len(self._textures),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self) -> None:
+        for key in list(self._textures):
+            if self.size <= self._max_size:
+                break
+            if key in self._pins:
+                continue
+
+            self.size -= self._get_texture_size(self._textures.pop(key))
+            self.evictions += 1
+
+
+texture_cache = TextureCache(max_size=32 * 1024 * 1024)
+
+disk_image_cache = DiskImageCache(
+    os.path.join(GLib.get_user_cache_dir(), "tanuki", "images"), max_size=64 * 1024 * 1024
+)
@@ -0,0 +1,123 @@
+# paginated_model.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from gi.repository import Gio, GLib, GObject
+from tanuki.architecture.async_utils import Priority, async_job_finished, cancel_async_jobs
+
+# fetch_page(cursor) -> (items of the page, cursor of the next page or None)
+PageFetcher = Callable[[Any], tuple[list[GObject.Object], Any]]
+
+
+class PaginatedListModel(GObject.Object, Gio.ListModel):
+    """A list model that fetches its pages lazily, as the list view scrolls.
+
+    The page after the last exposed one is always prefetched, so reaching
+    the end of the list usually doesn't have to wait for the network.
+    """
+
+    __gtype_name__ = "PaginatedListModel"
+
+    loading = GObject.Property(type=bool, default=False)
+
+    # Start exposing the next page when the view gets this close to the end
+    THRESHOLD = 10
+
+    def __init__(
+        self,
+        item_type: type[GObject.Object],
+        fetch_page: PageFetcher,
+        first_cursor: Any = None,
+        first_page: tuple[list[GObject.Object], Any] | None = None,
+    ) -> None:
+        """Start fetching from `first_cursor`, or from an already fetched `first_page`."""
+        super().__init__()
+        self._item_type = item_type
+        self._fetch_page = fetch_page
+
+        self._prefetched_items = None
+        self._idle_source = 0
+
+        if first_page is not None:
+            self._items, self._next_cursor = list(first_page[0]), first_page[1]
+            self._wants_more = False
+        else:
+            self._items, self._next_cursor = [], first_cursor
+            self._wants_more = True
+
+        self._fetch()
+
+    def do_get_item_type(self) -> GObject.GType:
+        return self._item_type.__gtype__
+
+    def do_get_n_items(self) -> int:
+        return len(self._items)
+
+    def do_get_item(self, position: int) -> GObject.Object | None:
+        if position >= len(self._items) - self.THRESHOLD and not self._idle_source:
+            # Changing the model from inside get_item() would confuse the view
+            self._idle_source = GLib.idle_add(self._request_more)
+
+        if position < len(self._items):
+            return self._items[position]
+        return None
+
+    def _request_more(self) -> bool:
+        self._idle_source = 0
+
+        if self._prefetched_items is not None:
+            self._expose(self._prefetched_items)
+            self._prefetched_items = None
+            self._fetch()
+        else:
+            self._wants_more = True
+            self._fetch()
+
+        return GLib.SOURCE_REMOVE
+
+    def cancel(self) -> None:
+        """Stop fetching pages, for good."""
+        if self._idle_source:
+            GLib.source_remove(self._idle_source)
+            self._idle_source = 0
+
+        cancel_async_jobs(self)
+        self._next_cursor = None
+        self.props.loading = False
+
+    def _expose(self, items: list[GObject.Object]) -> None:
+        if not items:
+            return
+
+        position = len(self._items)
+        self._items.extend(items)
+        self.items_changed(position, 0, len(items))
+
+    def _fetch(self) -> None:
+        if self.props.loading or self._next_cursor is None or self._prefetched_items is not None:
+            return
+
+        self.props.loading = True
+        priority = Priority.VISIBLE if self._wants_more else Priority.PREFETCH
+        self._page_fetched(self._fetch_page, self._next_cursor, priority=priority)
+
+    @async_job_finished
+    def _page_fetched(self, result: tuple[list[GObject.Object], Any] | None) -> None:
+        self.props.loading = False
+        if result is None:
+            return
+
+        items, self._next_cursor = result
+
+        if self._wants_more:
+            self._wants_more = False
+            self._expose(items)
+        else:
+            self._prefetched_items = items
+
+        self._fetch()
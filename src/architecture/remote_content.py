@@ -3,43 +3,221 @@
 # SPDX-FileCopyrightText: 2024  Benedek Dévényi
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from __future__ import annotations
 
-import requests
-from gi.repository import Gdk, GLib, GObject
-from tanuki.architecture import async_job_finished
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from gi.repository import Gdk, GdkPixbuf, Gio, GLib, GObject, Gtk
+from tanuki.architecture import AsyncWorker, Priority
+from tanuki.architecture.image_cache import disk_image_cache, texture_cache
+
+# Widths GitLab's image scaler accepts for avatars
+GITLAB_AVATAR_WIDTHS = (16, 20, 24, 32, 40, 48, 64, 96, 160)
+
+# (image url, size in device pixels, or 0 for the original size)
+ImageKey = tuple[str, int]
+
+
+def get_size_bucket(size: int) -> int:
+    """Round `size` up to a width the server can scale to, so nearby sizes share a texture."""
+    if size <= 0:
+        return 0
+    for width in GITLAB_AVATAR_WIDTHS:
+        if width >= size:
+            return width
+    return size
+
+
+def get_resized_url(image_url: str, size: int) -> str:
+    """Ask the server for a scaled-down variant of the image, where it knows how to."""
+    url = urlparse(image_url)
+    query = dict(parse_qsl(url.query))
+
+    if url.netloc.endswith("gravatar.com"):
+        query["s"] = str(size)
+    elif "/uploads/" in url.path and size in GITLAB_AVATAR_WIDTHS:
+        query["width"] = str(size)
+    else:
+        return image_url
+
+    return url._replace(query=urlencode(query)).geturl()
 
 
 class RemoteImages:
-    _downloaded_images = {}
+    # image key -> (cancellable, callbacks waiting for the download, its worker)
+    _in_flight: dict[ImageKey, tuple[Gio.Cancellable, list[Callable], AsyncWorker]] = {}
+
+    @classmethod
+    def request(
+        cls,
+        key: ImageKey,
+        callback: Callable[[Gdk.Texture | None], None],
+        priority: Priority = Priority.VISIBLE,
+    ) -> None:
+        """Call `callback` with the image, downloading it at most once at a time.
+
+        Must be called from the main thread.
+        """
+        if (image := texture_cache.get(key)) is not None:
+            callback(image)
+            return
+
+        in_flight = cls._in_flight.get(key)
+        if in_flight is not None and not in_flight[0].is_cancelled():
+            in_flight[1].append(callback)
+            # Someone is waiting for what was only a prefetch so far
+            in_flight[2].promote(priority)
+            return
+
+        cancellable = Gio.Cancellable()
+        callbacks = [callback]
+
+        def finished(worker: AsyncWorker, result: Gio.AsyncResult, _) -> None:
+            if cls._in_flight.get(key, (None,))[0] is cancellable:
+                del cls._in_flight[key]
+            if cancellable.is_cancelled():
+                return
+
+            image = worker.finish(result)
+            for callback in callbacks:
+                callback(image)
+
+        worker = AsyncWorker(
+            *key,
+            operation=cls.download,
+            callback=finished,
+            priority=priority,
+            cancellable=cancellable,
+        )
+        cls._in_flight[key] = (cancellable, callbacks, worker)
+        worker.start()
+
+    @classmethod
+    def cancel(cls, key: ImageKey, callback: Callable[[Gdk.Texture | None], None]) -> None:
+        """Stop waiting for an image, and cancel its download if nobody else is."""
+        if key not in cls._in_flight:
+            return
+
+        cancellable, callbacks, _ = cls._in_flight[key]
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            cancellable.cancel()
 
     @classmethod
-    def download(cls, image_url: str) -> None:
-        if image_url in cls._downloaded_images:
-            return cls._downloaded_images[image_url]
+    def download(cls, image_url: str, size: int = 0) -> Gdk.Texture:
+        # request() has already counted the miss, this is only for a concurrent download
+        if (image := texture_cache.peek((image_url, size))) is not None:
+            return image
+
+        fetch_url = get_resized_url(image_url, size) if size else image_url
+        content = disk_image_cache.get_fresh(fetch_url)
+        if content is None:
+            content = cls._fetch(fetch_url)
 
-        content = requests.get(image_url).content
-        image = Gdk.Texture.new_from_bytes(GLib.Bytes(content))
-        cls._downloaded_images[image_url] = image
+        image = cls._decode(content, size)
+        texture_cache.put((image_url, size), image)
         return image
 
+    @staticmethod
+    def _fetch(image_url: str) -> bytes:
+        from tanuki.architecture import get_http_session
+
+        http_session = get_http_session(image_url)
+        headers = disk_image_cache.get_conditional_headers(image_url)
+        response = http_session.get(image_url, headers=headers)
+
+        if response.status_code == 304:
+            content = disk_image_cache.revalidate(image_url, response.headers)
+            if content is not None:
+                return content
+            response = http_session.get(image_url)
+
+        if response.ok:
+            disk_image_cache.store(image_url, response.content, response.headers)
+        return response.content
+
+    @staticmethod
+    def _decode(content: bytes, size: int) -> Gdk.Texture:
+        if not size:
+            return Gdk.Texture.new_from_bytes(GLib.Bytes(content))
+
+        def downscale(loader: GdkPixbuf.PixbufLoader, width: int, height: int) -> None:
+            scale = size / max(width, height)
+            if scale < 1:
+                loader.set_size(max(1, round(width * scale)), max(1, round(height * scale)))
+
+        loader = GdkPixbuf.PixbufLoader()
+        loader.connect("size-prepared", downscale)
+        loader.write_bytes(GLib.Bytes(content))
+        loader.close()
+        return Gdk.Texture.new_for_pixbuf(loader.get_pixbuf())
+
 
 class RemoteImage(GObject.Object):
     image = GObject.Property(type=Gdk.Texture)
+    size = GObject.Property(type=int)
 
-    def __init__(self, target: GObject.Object, target_property: str) -> None:
+    def __init__(self, target: GObject.Object, target_property: str, size: int = 0) -> None:
         super().__init__()
+        self._url = None
+        self._requested_key = None
+        self._pinned_key = None
+
+        self.props.size = size
+        self.connect("notify::size", self.on_size_changed)
+
         target.connect("notify::" + target_property, self.update_image)
+        if isinstance(target, Gtk.Widget):
+            target.connect("destroy", self.on_target_destroyed)
 
     def bind_to(self, target: GObject.Object, target_property: str) -> None:
         self.bind_property("image", target, target_property)
 
     def update_image(self, source: GObject.Object, param: GObject.ParamSpec) -> None:
-        url = source.get_property(param.name)
-        if url:
-            self.do_update_image(RemoteImages.download, url)
+        self._url = source.get_property(param.name)
+        self._request_image()
+
+    def on_size_changed(self, *_) -> None:
+        if not self._url:
+            return
+
+        key = (self._url, get_size_bucket(self.props.size))
+        if key != (self._requested_key or self._pinned_key):
+            self._request_image()
+
+    def _request_image(self) -> None:
+        self._cancel_request()
+
+        if self._url:
+            self._requested_key = (self._url, get_size_bucket(self.props.size))
+            RemoteImages.request(self._requested_key, self.do_update_image)
         else:
+            self._set_pinned_key(None)
             self.props.image = None
 
-    @async_job_finished
-    def do_update_image(self, image: Gdk.Texture) -> None:
+    def on_target_destroyed(self, *_) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """Cancel the download, and let the cache evict the image."""
+        self._cancel_request()
+        self._set_pinned_key(None)
+
+    def _cancel_request(self) -> None:
+        if self._requested_key is not None:
+            RemoteImages.cancel(self._requested_key, self.do_update_image)
+            self._requested_key = None
+
+    def _set_pinned_key(self, key: ImageKey | None) -> None:
+        if key is not None:
+            texture_cache.pin(key)
+        if self._pinned_key is not None:
+            texture_cache.unpin(self._pinned_key)
+        self._pinned_key = key
+
+    def do_update_image(self, image: Gdk.Texture | None) -> None:
+        self._set_pinned_key(self._requested_key)
+        self._requested_key = None
         self.props.image = image
@@ -0,0 +1,92 @@
+# stale_while_revalidate.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Any, Callable
+from weakref import ref
+
+from gi.repository import GObject, Gtk
+from tanuki.architecture.async_utils import Priority, async_job_finished, cancel_async_jobs
+
+
+class StaleWhileRevalidate(GObject.Object):
+    """Bind properties of `target` to data that is shown stale first, then revalidated.
+
+    `properties` maps the target's property names to dotted attribute paths
+    on the data. The target is filled right away from `get_cached()`, if it
+    has anything, then `fetch()` runs in the background and only the
+    properties whose values changed are set again.
+
+    `get_stored()` is a slower fallback for `get_cached()`, such as a read
+    from disk, so it runs in the worker pool, and its data is only shown if
+    it arrives before the fresh data.
+    """
+
+    revalidating = GObject.Property(type=bool, default=False)
+
+    @GObject.Signal(arg_types=(object,))
+    def updated(self, data: Any): ...
+
+    def __init__(
+        self,
+        target: GObject.Object,
+        properties: dict[str, str],
+        get_cached: Callable[[], Any | None],
+        fetch: Callable[[], Any],
+        get_stored: Callable[[], Any | None] | None = None,
+    ) -> None:
+        super().__init__()
+        self._target = ref(target)
+        self._getters = {name: attrgetter(path) for name, path in properties.items()}
+        self._get_cached = get_cached
+        self._get_stored = get_stored
+        self._fetch = fetch
+        self._revalidated_once = False
+
+        if isinstance(target, Gtk.Widget):
+            target.connect("destroy", lambda *_: cancel_async_jobs(self))
+
+    def start(self) -> None:
+        """Show the cached data, if any, and revalidate it."""
+        if (data := self._get_cached()) is not None:
+            self._apply(data)
+        elif self._get_stored is not None:
+            self._stored_loaded(self._get_stored, priority=Priority.VISIBLE)
+        self.revalidate()
+
+    def revalidate(self) -> None:
+        self.props.revalidating = True
+        self._revalidated(self._fetch, priority=Priority.VISIBLE)
+
+    def cancel(self) -> None:
+        """Stop loading the stored data and revalidating."""
+        cancel_async_jobs(self)
+        self.props.revalidating = False
+
+    @async_job_finished
+    def _stored_loaded(self, data: Any | None) -> None:
+        if data is not None and not self._revalidated_once:
+            self._apply(data)
+
+    @async_job_finished
+    def _revalidated(self, data: Any | None) -> None:
+        self.props.revalidating = False
+        if data is not None:
+            self._revalidated_once = True
+            self._apply(data)
+
+    def _apply(self, data: Any) -> None:
+        target = self._target()
+        if target is None:
+            return
+
+        for name, getter in self._getters.items():
+            value = getter(data)
+            if target.get_property(name) != value:
+                target.set_property(name, value)
+
+        self.emit("updated", data)
@@ -1,9 +1,41 @@
-from .login import (
-    GitLabDotComOAuthLogin,
-    Login,
-    OAuthLogin,
-    OAuthLoginManager,
-    PersonalAccessTokenLogin,
-)
-from .session import SessionManager, session
+import sys
+from importlib import import_module
+
+from .session_registry import AccountInfo, session_registry
 from .settings import settings
+
+# Exported name -> module it lives in. These modules are only imported on first
+# access, so importing tanuki.backend doesn't pull in the whole session machinery.
+_lazy_exports = {
+    "GitLabDotComOAuthLogin": ".login",
+    "Login": ".login",
+    "OAuthLogin": ".login",
+    "OAuthLoginManager": ".login",
+    "PersonalAccessTokenLogin": ".login",
+    "Project": ".models",
+    "User": ".models",
+    "activity_poller": ".activity",
+    "SessionManager": ".session",
+    "UserPageData": ".session",
+    "session": ".session",
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import_module(_lazy_exports[name], __name__)
+
+    # Importing a module binds every submodule it imports here too, such as the
+    # session module as `session`. Set the names of all the modules imported so
+    # far, which also replaces that with the actual session object.
+    for export, module_name in _lazy_exports.items():
+        if (module := sys.modules.get(__name__ + module_name)) is not None:
+            globals()[export] = getattr(module, export)
+
+    return globals()[name]
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *_lazy_exports]
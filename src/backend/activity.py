@@ -0,0 +1,162 @@
+# activity.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from gi.repository import GLib, GObject
+from tanuki.architecture import Priority, async_job_finished, cancel_async_jobs
+
+from .offline_store import offline_store
+from .session import session
+
+
+class ActivityPoller(GObject.Object):
+    """Polls the events of the current session, fetching only the ones it hasn't seen yet.
+
+    The interval doubles after every poll that brings nothing new, and is
+    stretched further while the window is hidden, so an idle Tanuki barely
+    touches the server.
+    """
+
+    __gtype_name__ = "ActivityPoller"
+
+    unread_count = GObject.Property(type=int)
+    # Whether anyone is looking, polls are much rarer when not
+    active = GObject.Property(type=bool, default=True)
+
+    MIN_INTERVAL = 60
+    MAX_INTERVAL = 15 * 60
+    INACTIVE_FACTOR = 4
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._session_id = ""
+        self._timeout = 0
+        self._in_flight = False
+        self._interval = self.MIN_INTERVAL
+        self._last_poll = 0.0
+
+        # Newest known event, used as the cursor of the next poll
+        self._last_id = None
+        self._last_created_at = None
+        # Events newer than this are unread
+        self._read_id = None
+
+        self.connect("notify::active", lambda *_: self._reschedule())
+        session.connect("login-started", lambda *_: self.stop())
+        # Login signals may be emitted from a worker thread
+        session.connect("login-completed", lambda *_: GLib.idle_add(self.start))
+        session.connect("login-failed", lambda *_: GLib.idle_add(self._resume))
+
+    def start(self) -> None:
+        self.stop()
+        self._session_id = session.session_id
+        self._interval = self.MIN_INTERVAL
+        self._poll()
+
+    def _resume(self) -> None:
+        # A failed account switch leaves the previous session in use
+        if not self._session_id and session.context.gitlab is not None:
+            self.start()
+
+    def stop(self) -> None:
+        if self._timeout:
+            GLib.source_remove(self._timeout)
+            self._timeout = 0
+
+        cancel_async_jobs(self)
+        self._session_id = ""
+        self._in_flight = False
+        self._last_id = self._last_created_at = self._read_id = None
+        self.props.unread_count = 0
+
+    def mark_read(self) -> None:
+        self._read_id = self._last_id
+        if self.props.unread_count:
+            self.props.unread_count = 0
+
+    def _poll(self) -> bool:
+        self._timeout = 0
+        self._in_flight = True
+        self._last_poll = time.monotonic()
+
+        self._events_fetched(
+            self._fetch_events,
+            self._session_id,
+            self._last_id,
+            self._last_created_at,
+            priority=Priority.PREFETCH,
+        )
+        return GLib.SOURCE_REMOVE
+
+    @staticmethod
+    def _fetch_events(
+        session_id: str, last_id: int | None, last_created_at: str | None
+    ) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+        """Fetch the new events, along with the newest stored one if there was no cursor yet."""
+        context = session.context
+        if context.session_id != session_id:
+            # The session was removed or switched since the poll was scheduled
+            return None, []
+
+        stored_event = None
+        if last_id is None:
+            # Continue from the events stored by the previous run
+            stored_events = offline_store.get_events(session_id, limit=1)
+            if stored_events:
+                stored_event = stored_events[0]
+                last_id, last_created_at = stored_event["id"], stored_event["created_at"]
+
+        events = session.get_events_since(last_id, last_created_at, context=context)
+        if session.session_id != session_id:
+            return None, []
+
+        offline_store.save_events(session_id, events)
+        return stored_event, events
+
+    @async_job_finished
+    def _events_fetched(
+        self, result: tuple[dict[str, Any] | None, list[dict[str, Any]]] | None
+    ) -> None:
+        self._in_flight = False
+        stored_event, events = result or (None, [])
+
+        if stored_event is not None and self._last_id is None:
+            # Stored events were seen in the previous run, those count as read
+            self._last_id = self._read_id = stored_event["id"]
+            self._last_created_at = stored_event["created_at"]
+
+        if events:
+            self._last_id = events[0]["id"]
+            self._last_created_at = events[0]["created_at"]
+            self._interval = self.MIN_INTERVAL
+
+            if self._read_id is None:
+                # The very first poll only finds out where the feed is
+                self._read_id = self._last_id
+            else:
+                self.props.unread_count += sum(event["id"] > self._read_id for event in events)
+        else:
+            # Nothing new, or an error: either way, ask less often
+            self._interval = min(self._interval * 2, self.MAX_INTERVAL)
+
+        self._reschedule()
+
+    def _reschedule(self) -> None:
+        if not self._session_id or self._in_flight:
+            return
+
+        if self._timeout:
+            GLib.source_remove(self._timeout)
+
+        interval = self._interval if self.props.active else self._interval * self.INACTIVE_FACTOR
+        delay = max(0, self._last_poll + interval - time.monotonic())
+        self._timeout = GLib.timeout_add_seconds(int(delay), self._poll)
+
+
+activity_poller = ActivityPoller()
@@ -0,0 +1,76 @@
+# graphql.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import gitlab
+
+USER_PAGE_QUERY = """
+query ($username: String!, $first: Int!) {
+  user(username: $username) {
+    id username name bio avatarUrl webUrl
+    namespace {
+      projects(first: $first) {
+        nodes { id name fullPath description avatarUrl webUrl starCount }
+        pageInfo { hasNextPage endCursor }
+      }
+    }
+  }
+}
+"""
+
+USER_PROJECTS_QUERY = """
+query ($username: ID!, $first: Int!, $after: String) {
+  namespace(fullPath: $username) {
+    projects(first: $first, after: $after) {
+      nodes { id name fullPath description avatarUrl webUrl starCount }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+
+class GraphQLError(Exception): ...
+
+
+class GraphQLClient:
+    """Sends GraphQL queries with the session, credentials and retries of a REST client."""
+
+    def __init__(self, gitlab_: gitlab.Gitlab) -> None:
+        self._gitlab = gitlab_
+        self._url = f"{gitlab_.url}/api/graphql"
+        self._supported = None
+
+    def query(self, query: str, variables: dict[str, Any]) -> dict[str, Any] | None:
+        """Run `query`, or return None if the instance has no usable GraphQL API."""
+        if self._supported is False:
+            return None
+
+        import gitlab
+
+        try:
+            result = self._gitlab.http_post(
+                self._url, post_data={"query": query, "variables": variables}
+            )
+        except gitlab.GitlabHttpError as e:
+            if e.response_code in (403, 404):
+                self._supported = False
+                return None
+            raise
+
+        self._supported = True
+
+        if result.get("errors"):
+            raise GraphQLError(result["errors"][0]["message"])
+        return result["data"]
+
+
+def get_id_from_global_id(global_id: str) -> int:
+    """Turn a GraphQL global ID, like gid://gitlab/User/1, into the REST ID."""
+    return int(global_id.rsplit("/", 1)[-1])
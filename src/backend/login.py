@@ -6,13 +6,16 @@ from __future__ import annotations
 
 import random
 import string
+import time
 from dataclasses import dataclass
-from typing import Callable, NoReturn, Protocol
+from typing import TYPE_CHECKING, Callable, NoReturn, Protocol
 
-import requests
 from gi.repository import GLib, Gtk
 from tanuki.architecture import async_job_finished
 
+if TYPE_CHECKING:
+    import requests
+
 
 class InvalidCredentialsError(Exception): ...
 
@@ -32,6 +35,13 @@ class PersonalAccessTokenLogin:
         return {"url": self.url, "private_token": self.token}
 
 
+def _post(url: str) -> requests.Response:
+    # requests is slow to import, so it's left until the first request
+    from tanuki.architecture import get_http_session
+
+    return get_http_session(url).post(url)
+
+
 def generate_url_parameters(parameters: dict[str, str]) -> str:
     return "&".join([f"{key}={value}" for key, value in parameters.items()])
 
@@ -52,11 +62,19 @@ class OAuthLoginManager:
 
     @classmethod
     def redirect(cls, state: str, code: str) -> None:
+        if state not in cls._login_state:
+            # A stale link, or a login started by a previous run of Tanuki
+            return
+
         login_class, *_ = cls._login_state[state]
-        cls.finish_auth_flow(requests.post, login_class._get_token_url(code), direct_args=(state,))
+        token_url = login_class._get_token_url(code)
+        cls.finish_auth_flow(_post, token_url, direct_args=(state,))
 
     @classmethod
     def access_denied(cls, state: str) -> None:
+        if state not in cls._login_state:
+            return
+
         *_, access_denied_callback = cls._login_state[state]
         access_denied_callback()
 
@@ -77,14 +95,13 @@ class OAuthLoginManager:
     @classmethod
     @async_job_finished
     def finish_auth_flow(cls, response: requests.Response, state: str) -> None | NoReturn:
-        if response.ok:
-            data = response.json()
-            access_token, refresh_token = data["access_token"], data["refresh_token"]
-        else:
+        if not response.ok:
             raise InvalidCredentialsError
 
         login_type, callback, _ = cls._login_state[state]
-        callback(login_type(access_token, refresh_token))
+        login = login_type()
+        login._update_tokens(response.json())
+        callback(login)
 
 
 class OAuthLogin:
@@ -97,9 +114,19 @@ class OAuthLogin:
         super().__init_subclass__()
         OAuthLoginManager.providers[cls._base_url] = cls
 
-    def __init__(self, access_token: str | None = None, refresh_token: str | None = None) -> None:
+    def __init__(
+        self,
+        access_token: str | None = None,
+        refresh_token: str | None = None,
+        expires_at: float | None = None,
+    ) -> None:
         self.access_token = access_token
         self.refresh_token = refresh_token
+        self.expires_at = expires_at
+
+    def expires_within(self, seconds: float) -> bool:
+        """Whether the access token expires in `seconds`. Tokens of unknown age always do."""
+        return self.expires_at is None or self.expires_at - time.time() <= seconds
 
     @property
     def gitlab_auth_kwargs(self) -> dict[str, str] | NoReturn:
@@ -149,16 +176,22 @@ class OAuthLogin:
 
     def refresh_access_token(self) -> None | NoReturn:
         url = self._get_refresh_url()
-        response = requests.post(url)
+        response = _post(url)
 
         if response.ok:
-            data = response.json()
-
-            self.access_token = data["access_token"]
-            self.refresh_token = data["refresh_token"]
+            self._update_tokens(response.json())
         else:
             raise InvalidCredentialsError
 
+    def _update_tokens(self, data: dict) -> None:
+        self.access_token = data["access_token"]
+        self.refresh_token = data["refresh_token"]
+
+        if "expires_in" in data:
+            self.expires_at = data.get("created_at", time.time()) + data["expires_in"]
+        else:
+            self.expires_at = None
+
 
 class GitLabDotComOAuthLogin(OAuthLogin):
     _client_id = "69cf882b9dbec27f748a4fada7cf82d392b564025d340b69f3b868c5119a86cb"
@@ -0,0 +1,104 @@
+# models.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urljoin
+
+from gi.repository import GObject
+
+from .graphql import get_id_from_global_id
+
+if TYPE_CHECKING:
+    from gitlab.base import RESTObject
+
+
+def _get_absolute_url(instance_url: str, url: str | None) -> str:
+    # GraphQL returns paths relative to the instance for uploaded avatars
+    return urljoin(instance_url, url) if url else ""
+
+
+class Model(GObject.Object):
+    """Base class of the plain data objects the UI binds to."""
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            pspec.name.replace("-", "_"): self.get_property(pspec.name)
+            for pspec in self.list_properties()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Model:
+        return cls(**data)
+
+
+class User(Model):
+    __gtype_name__ = "User"
+
+    id = GObject.Property(type=int)
+    username = GObject.Property(type=str)
+    name = GObject.Property(type=str)
+    bio = GObject.Property(type=str)
+    avatar_url = GObject.Property(type=str)
+    web_url = GObject.Property(type=str)
+
+    @classmethod
+    def from_rest(cls, user: RESTObject) -> User:
+        return cls(
+            id=user.id,
+            username=user.username,
+            name=user.name,
+            bio=getattr(user, "bio", None) or "",
+            avatar_url=user.avatar_url or "",
+            web_url=user.web_url,
+        )
+
+    @classmethod
+    def from_graphql(cls, user: dict[str, Any], instance_url: str) -> User:
+        return cls(
+            id=get_id_from_global_id(user["id"]),
+            username=user["username"],
+            name=user["name"],
+            bio=user["bio"] or "",
+            avatar_url=_get_absolute_url(instance_url, user["avatarUrl"]),
+            web_url=user["webUrl"],
+        )
+
+
+class Project(Model):
+    __gtype_name__ = "Project"
+
+    id = GObject.Property(type=int)
+    name = GObject.Property(type=str)
+    path_with_namespace = GObject.Property(type=str)
+    description = GObject.Property(type=str)
+    avatar_url = GObject.Property(type=str)
+    web_url = GObject.Property(type=str)
+    star_count = GObject.Property(type=int)
+
+    @classmethod
+    def from_rest(cls, project: RESTObject) -> Project:
+        return cls(
+            id=project.id,
+            name=project.name,
+            path_with_namespace=project.path_with_namespace,
+            description=project.description or "",
+            avatar_url=project.avatar_url or "",
+            web_url=project.web_url,
+            star_count=project.star_count,
+        )
+
+    @classmethod
+    def from_graphql(cls, project: dict[str, Any], instance_url: str) -> Project:
+        return cls(
+            id=get_id_from_global_id(project["id"]),
+            name=project["name"],
+            path_with_namespace=project["fullPath"],
+            description=project["description"] or "",
+            avatar_url=_get_absolute_url(instance_url, project["avatarUrl"]),
+            web_url=project["webUrl"],
+            star_count=project["starCount"],
+        )
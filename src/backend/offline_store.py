@@ -0,0 +1,150 @@
+# offline_store.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Iterator
+
+from gi.repository import GLib
+
+from .models import Project, User
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    session_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (session_id, id)
+);
+CREATE INDEX IF NOT EXISTS users_username ON users (session_id, username);
+
+CREATE TABLE IF NOT EXISTS projects (
+    session_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (session_id, id)
+);
+CREATE INDEX IF NOT EXISTS projects_path ON projects (session_id, path);
+CREATE INDEX IF NOT EXISTS projects_owner ON projects (session_id, owner, position);
+
+CREATE TABLE IF NOT EXISTS events (
+    session_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, id)
+);
+"""
+
+
+class OfflineStore:
+    """Local SQLite copy of the data fetched by each session.
+
+    Pages can render from it before the network answers, or when it never
+    does. The database is only opened on first use, from a worker thread.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._connection = None
+        self._lock = Lock()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            if self._connection is None:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                self._connection = sqlite3.connect(self._path, check_same_thread=False)
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.executescript(SCHEMA)
+
+            with self._connection:
+                yield self._connection
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        with self._transaction() as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def save_user(self, session_id: str, user: User) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)",
+            (session_id, user.id, user.username, json.dumps(user.to_dict()), time.time()),
+        )
+
+    def get_user(self, session_id: str, username: str) -> User | None:
+        rows = self._execute(
+            "SELECT data FROM users WHERE session_id = ? AND username = ? "
+            "ORDER BY updated DESC LIMIT 1",
+            (session_id, username),
+        )
+        return User.from_dict(json.loads(rows[0][0])) if rows else None
+
+    def save_projects_of_user(
+        self, session_id: str, username: str, projects: list[Project]
+    ) -> None:
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM projects WHERE session_id = ? AND owner = ?", (session_id, username)
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        project.id,
+                        project.path_with_namespace,
+                        username,
+                        position,
+                        json.dumps(project.to_dict()),
+                        now,
+                    )
+                    for position, project in enumerate(projects)
+                ],
+            )
+
+    def get_projects_of_user(self, session_id: str, username: str) -> list[Project]:
+        rows = self._execute(
+            "SELECT data FROM projects WHERE session_id = ? AND owner = ? ORDER BY position",
+            (session_id, username),
+        )
+        return [Project.from_dict(json.loads(data)) for data, in rows]
+
+    def save_events(self, session_id: str, events: list[dict[str, Any]]) -> None:
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, event["id"], event["created_at"], json.dumps(event))
+                    for event in events
+                ],
+            )
+
+    def get_events(self, session_id: str, limit: int = 100) -> list[dict[str, Any]]:
+        rows = self._execute(
+            "SELECT data FROM events WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit),
+        )
+        return [json.loads(data) for data, in rows]
+
+    def delete_session(self, session_id: str) -> None:
+        with self._transaction() as connection:
+            for table in ("users", "projects", "events"):
+                connection.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+
+offline_store = OfflineStore(os.path.join(GLib.get_user_data_dir(), "tanuki", "offline.sqlite3"))
@@ -0,0 +1,112 @@
+# response_cache.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import inspect
+import time
+from collections import Counter
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+DEFAULT_TTLS = {"user": 5 * 60, "projects": 2 * 60}
+# Expired entries are kept this long for peek(), then dropped
+STALE_FOR = 30 * 60
+
+
+class ResponseCache:
+    """API responses cached per session, each resource type with its own TTL."""
+
+    def __init__(self, ttls: dict[str, float]) -> None:
+        self._ttls = dict(ttls)
+        self._entries: dict[tuple[str, str, Hashable], tuple[float, Any]] = {}
+        self._lock = Lock()
+
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def set_ttl(self, resource: str, ttl: float) -> None:
+        with self._lock:
+            self._ttls[resource] = ttl
+
+    def get(self, session_id: str, resource: str, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get((session_id, resource, key))
+            if entry is None or entry[0] < time.monotonic():
+                self.misses[resource] += 1
+                return False, None
+
+            self.hits[resource] += 1
+            return True, entry[1]
+
+    def peek(self, session_id: str, resource: str, key: Hashable) -> Any | None:
+        """Return an entry even if it has expired, without counting it as a hit or miss."""
+        with self._lock:
+            entry = self._entries.get((session_id, resource, key))
+            return None if entry is None else entry[1]
+
+    def put(self, session_id: str, resource: str, key: Hashable, value: Any) -> None:
+        with self._lock:
+            now = time.monotonic()
+            for entry_key in [
+                entry_key
+                for entry_key, (expires, _) in self._entries.items()
+                if expires + STALE_FOR < now
+            ]:
+                del self._entries[entry_key]
+
+            self._entries[(session_id, resource, key)] = (now + self._ttls.get(resource, 0), value)
+
+    def invalidate(self, session_id: str, resource: str | None = None) -> None:
+        with self._lock:
+            for entry_key in list(self._entries):
+                if entry_key[0] == session_id and resource in (None, entry_key[1]):
+                    del self._entries[entry_key]
+
+    def get_hit_rates(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                resource: self.hits[resource] / (self.hits[resource] + self.misses[resource])
+                for resource in self.hits | self.misses
+            }
+
+
+response_cache = ResponseCache(DEFAULT_TTLS)
+
+
+def cached_response(resource: str) -> Callable:
+    """Cache the return value of a `Tanuki` method in the response cache of its session.
+
+    The session is read once, when the method is called, and passed on as `context`.
+    Responses that arrive after switching to another session aren't cached.
+
+    The cache key is the arguments with their defaults filled in, so
+    `f(username)` and `f(username, FIRST_PAGE)` share an entry.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(self, *args, context=None):
+            if context is None:
+                context = self.context
+
+            arguments = signature.bind(self, *args, context=context)
+            arguments.apply_defaults()
+            # Everything but self and the context
+            key = tuple(arguments.arguments.values())[1:-1]
+
+            found, value = response_cache.get(context.session_id, resource, key)
+            if not found:
+                value = func(self, *args, context=context)
+                if context.session_id == self.session_id:
+                    response_cache.put(context.session_id, resource, key, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -3,20 +3,34 @@
 # SPDX-FileCopyrightText: 2024  Benedek Dévényi
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from __future__ import annotations
 
 import hashlib
 import json
 from collections import namedtuple
-from functools import cache
-from typing import Callable
+from datetime import date, timedelta
+from functools import partial, wraps
+from itertools import count
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable
 from urllib.parse import urlparse
 
-import gitlab
-from gi.repository import Gio, GObject, Secret
-from tanuki.architecture import async_job_finished, threaded
+from gi.repository import Gio, GLib, GObject, Secret
+from tanuki.architecture import Priority, async_job_finished, run_in_thread, threaded
 
+from .graphql import USER_PAGE_QUERY, USER_PROJECTS_QUERY, GraphQLClient
 from .login import Login, OAuthLogin, OAuthLoginManager, PersonalAccessTokenLogin
+from .models import Project, User
+from .offline_store import offline_store
+from .response_cache import cached_response, response_cache
+from .session_registry import AccountInfo, SessionRegistry, session_registry
 from .settings import settings
+from .token_refresh import REFRESH_MARGIN, TokenRefresher
+from .user_resolver import UserNotFoundError, UserResolver
+
+if TYPE_CHECKING:
+    # python-gitlab is slow to import, so it's only loaded when logging in
+    import gitlab
 
 schema = Secret.Schema.new(
     "io.github.rdbende.Tanuki",
@@ -25,12 +39,52 @@ schema = Secret.Schema.new(
 )
 
 
-AccountInfo = namedtuple("AccountInfo", ["username", "name", "avatar_url", "url"])
+UserPageData = namedtuple("UserPageData", ["user", "projects"])
+# Everything a request needs from the session it was started in
+SessionContext = namedtuple("SessionContext", ["session_id", "gitlab", "users", "graphql"])
+NO_SESSION = SessionContext("", None, None, None)
+
+PROJECTS_PER_PAGE = 20
+EVENTS_PER_PAGE = 20
+FIRST_PAGE = 0
+
+
+class NotLoggedInError(Exception):
+    """The session has no client yet, because the login hasn't finished or has failed."""
+
+
+def retry_if_unauthorized(func: Callable) -> Callable:
+    """Refresh the OAuth token and retry once if a `Tanuki` method got a 401."""
+
+    @wraps(func)
+    def wrapper(self, *args, context: SessionContext | None = None):
+        import gitlab
+
+        if context is None:
+            context = self.context
+        if context.gitlab is None:
+            raise NotLoggedInError(f"Session {context.session_id!r} isn't logged in")
+
+        access_token = context.gitlab.oauth_token
+        try:
+            return func(self, *args, context=context)
+        except gitlab.GitlabAuthenticationError:
+            if not self._token_refresher.refresh(context.session_id, access_token):
+                raise
+            return func(self, *args, context=context)
+
+    return wrapper
 
 
 class SessionManager:
     # TODO: make this class private, at least somewhat
-    _sessions = {}
+
+    # session id -> serialized secret, so only the first lookup has to reach the keyring
+    _secrets: dict[str, str] = {}
+    _secrets_lock = Lock()
+    # Queries waiting for prefetch_secrets() to finish, or None if it isn't running
+    _waiting_for_secrets: list[tuple[str, Callable]] | None = None
+    _secrets_prefetched = False
 
     @classmethod
     def get_session_id(cls, account_info: AccountInfo) -> str:
@@ -38,24 +92,16 @@ class SessionManager:
         return hashlib.md5(id_string.encode()).hexdigest()
 
     @classmethod
-    def get_session_from_id(cls, id: str) -> dict[str, str]:
-        return AccountInfo(**cls.get_sessions()[id])
+    def get_session_from_id(cls, id: str) -> AccountInfo:
+        return session_registry.get(id)
 
     @classmethod
     def any_sessions(cls) -> bool:
-        return len(cls.get_sessions()) > 0
-
-    @classmethod
-    def get_sessions(cls) -> dict[str, dict[str, str]]:
-        if not cls._sessions:
-            cls._cache_sessions()
-            settings.connect("notify::sessions", cls._cache_sessions)
-        return cls._sessions
+        return len(session_registry) > 0
 
     @classmethod
-    def _cache_sessions(cls, *_) -> None:
-        serialized_sessions = settings.props.sessions
-        cls._sessions = json.loads(serialized_sessions)
+    def get_sessions(cls) -> SessionRegistry:
+        return session_registry
 
     @classmethod
     def save_login(cls, session_id: str, login: Login) -> None:
@@ -64,42 +110,101 @@ class SessionManager:
                 "type": "oauth",
                 "access_token": login.access_token,
                 "refresh_token": login.refresh_token,
+                "expires_at": login.expires_at,
             }
         else:
             secret_data = {"type": "pat", "access_token": login.token}
 
+        secret = json.dumps(secret_data)
+        with cls._secrets_lock:
+            cls._secrets[session_id] = secret
+
         Secret.password_store(
             schema,
             {"session-id": session_id},
             Secret.COLLECTION_DEFAULT,
             f"Login with {urlparse(login.url).netloc}",
-            json.dumps(secret_data),
+            secret,
             None,
             lambda _, task: Secret.password_store_finish(task),
         )
 
+    @classmethod
+    def prefetch_secrets(cls) -> None:
+        """Load the secrets of every session with a single keyring search."""
+        with cls._secrets_lock:
+            if cls._secrets_prefetched or cls._waiting_for_secrets is not None:
+                return
+            cls._waiting_for_secrets = []
+
+        run_in_thread(cls._search_secrets, priority=Priority.VISIBLE)
+
+    @classmethod
+    def _search_secrets(cls) -> None:
+        flags = Secret.SearchFlags.ALL | Secret.SearchFlags.UNLOCK | Secret.SearchFlags.LOAD_SECRETS
+        secrets = {}
+        try:
+            for item in Secret.password_search_sync(schema, {}, flags, None):
+                session_id = item.get_attributes().get("session-id")
+                # Items from the keyring service already have their secret loaded by the search
+                value = item.get_secret() if isinstance(item, Secret.Item) else None
+                if value is None:
+                    value = item.retrieve_secret_sync(None)
+                if session_id and value is not None:
+                    secrets[session_id] = value.get_text()
+        except Exception:
+            # Not prefetched then, queries fall back to looking up their own secret
+            secrets = None
+        finally:
+            with cls._secrets_lock:
+                for session_id, secret in (secrets or {}).items():
+                    # Don't overwrite anything saved while the search was running
+                    cls._secrets.setdefault(session_id, secret)
+                waiting, cls._waiting_for_secrets = cls._waiting_for_secrets, None
+                cls._secrets_prefetched = secrets is not None
+
+            for session_id, callback in waiting:
+                GLib.idle_add(cls.query_login, session_id, callback)
+
+    @classmethod
+    def _deserialize_login(cls, session_id: str, secret: str) -> Login:
+        account_info = cls.get_session_from_id(session_id)
+        data = json.loads(secret)
+        if data["type"] == "oauth":
+            login_class = OAuthLoginManager.get_login_class_from_url(account_info.url)
+            return login_class(data["access_token"], data["refresh_token"], data.get("expires_at"))
+        else:
+            return PersonalAccessTokenLogin(account_info.url, data["access_token"])
+
     @classmethod
     def query_login(cls, session_id: str, callback: Callable[[Login], None]) -> None:
+        with cls._secrets_lock:
+            secret = cls._secrets.get(session_id)
+            if secret is None and cls._waiting_for_secrets is not None:
+                cls._waiting_for_secrets.append((session_id, callback))
+                return
+
+        if secret is not None:
+            callback(cls._deserialize_login(session_id, secret))
+            return
+
         def finish(_, task: Gio.Task) -> None:
             secret = Secret.password_lookup_finish(task)
             if secret is None:
                 callback(None)
                 return
 
-            account_info = SessionManager.get_session_from_id(session_id)
-            data = json.loads(secret)
-            if data["type"] == "oauth":
-                login_class = OAuthLoginManager.get_login_class_from_url(account_info.url)
-                login = login_class(data["access_token"], data["refresh_token"])
-            else:
-                login = PersonalAccessTokenLogin(account_info.url, data["access_token"])
-
-            callback(login)
+            with cls._secrets_lock:
+                cls._secrets.setdefault(session_id, secret)
+            callback(cls._deserialize_login(session_id, secret))
 
         Secret.password_lookup(schema, {"session-id": session_id}, None, finish)
 
     @classmethod
     def delete_secret(cls, session_id: str) -> None:
+        with cls._secrets_lock:
+            cls._secrets.pop(session_id, None)
+
         Secret.password_clear(
             schema,
             {"session-id": session_id},
@@ -109,35 +214,18 @@ class SessionManager:
 
     @classmethod
     def delete_session(cls, session_id: str) -> None:
-        sessions = cls.get_sessions()
-        sessions.pop(session_id)
-
+        session_registry.remove(session_id)
         cls.delete_secret(session_id)
-
-        serialized_sessions = json.dumps(sessions)
-        settings.props.sessions = serialized_sessions
         settings.props.current_session = ""
 
     @classmethod
     def create_session_if_not_exists(cls, account_info: AccountInfo, login: Login) -> str:
         session_id = cls.get_session_id(account_info)
-        sessions = cls.get_sessions()
-
-        if session_id in sessions:
+        if session_id in session_registry:
             return session_id
 
         cls.save_login(session_id, login)
-
-        sessions[session_id] = {
-            "username": account_info.username,
-            "name": account_info.name,
-            "avatar_url": account_info.avatar_url,
-            "url": account_info.url,
-        }
-
-        serialized_sessions = json.dumps(sessions)
-        settings.props.sessions = serialized_sessions
-
+        session_registry.put(session_id, account_info)
         return session_id
 
 
@@ -152,76 +240,369 @@ class Tanuki(GObject.Object):
     @GObject.Signal
     def login_failed(self): ...
 
-    def _validate_login(self, login: Login) -> bool:
-        gitlab_ = gitlab.Gitlab(**login.gitlab_auth_kwargs)
+    def __init__(self) -> None:
+        super().__init__()
+        # Replaced as a whole, so a request reading it once never mixes two sessions
+        self._context = NO_SESSION
+
+        # session id -> authenticated client, ready to switch to
+        self._clients: dict[str, gitlab.Gitlab] = {}
+        self._clients_lock = Lock()
+
+        self._token_refresher = TokenRefresher(self._on_token_refreshed)
+        # usernames being prefetched
+        self._prefetching: set[str] = set()
+
+    @property
+    def session_id(self) -> str:
+        return self._context.session_id
+
+    @property
+    def context(self) -> SessionContext:
+        return self._context
+
+    def _is_current(self, context: SessionContext) -> bool:
+        return context.session_id == self._context.session_id
+
+    def _authenticate(self, login: Login, session_id: str | None = None) -> gitlab.Gitlab | None:
+        """Log in, or return None if that failed.
+
+        If the OAuth token of a saved session is rejected, it is refreshed and
+        the login is retried once.
+        """
+        import gitlab
+        from tanuki.architecture import get_http_session
+
+        access_token = login.access_token if isinstance(login, OAuthLogin) else None
+        gitlab_ = gitlab.Gitlab(session=get_http_session(login.url), **login.gitlab_auth_kwargs)
         try:
             gitlab_.auth()
+        except gitlab.GitlabAuthenticationError:
+            if session_id is None or access_token is None:
+                return None
+            if not self._token_refresher.refresh(session_id, access_token):
+                return None
+            return self._authenticate(login)
         except Exception:
             return None
         else:
-            self._gitlab = gitlab_
-            return login
+            return gitlab_
+
+    def _use_client(self, session_id: str, gitlab_: gitlab.Gitlab) -> None:
+        self._context = SessionContext(
+            session_id, gitlab_, UserResolver(gitlab_), GraphQLClient(gitlab_)
+        )
+
+    def _add_client(
+        self, session_id: str, login: Login, gitlab_: gitlab.Gitlab, *, replace: bool = True
+    ) -> None:
+        """Store the client of a session, unless it has one already and `replace` is False."""
+        with self._clients_lock:
+            if not replace and session_id in self._clients:
+                return
+            self._clients[session_id] = gitlab_
+
+        if isinstance(login, OAuthLogin):
+            self._token_refresher.track(session_id, login)
 
     def create_session(self, login: Login) -> None:
-        self._save_and_start_session(self._validate_login, login)
+        self._save_and_start_session(self._authenticate, login, direct_args=(login,))
 
     @async_job_finished
-    def _save_and_start_session(self, login: Login) -> None:
-        if login is None:
+    def _save_and_start_session(self, gitlab_: gitlab.Gitlab | None, login: Login) -> None:
+        if gitlab_ is None:
             self.emit("login-failed")
             return
 
-        session_id = SessionManager.create_session_if_not_exists(self.get_account_info(), login)
-        self.start_session(session_id, _fallback_login_if_keyring_is_slow=login)
+        account_info = self._get_account_info(gitlab_)
+        session_id = SessionManager.create_session_if_not_exists(account_info, login)
 
-    def start_session(
-        self,
-        session_id: str,
-        *,
-        refresh_oauth_token: bool = False,
-        _fallback_login_if_keyring_is_slow: Login | None = None,
-    ) -> None:
+        # The client was just validated, so starting the session doesn't have to do it again
+        self._add_client(session_id, login, gitlab_)
+        self.start_session(session_id)
+
+    def start_session(self, session_id: str) -> None:
         self.emit("login-started")
+        previous_session_id = self.session_id
 
-        @threaded
-        def login_queried_callback(login: Login) -> None:
-            if refresh_oauth_token and isinstance(login, OAuthLogin):
-                login.refresh_access_token()
-                SessionManager.save_login(session_id, login)
+        with self._clients_lock:
+            warm_client = self._clients.get(session_id)
+
+        if warm_client is not None:
+            self._complete_login(previous_session_id, session_id, warm_client)
+            return
+
+        if self._context.gitlab is None and session_id == settings.props.current_session:
+            # Starting up, or offline: until the login is done, or if it fails,
+            # pages can show what was stored for this session. When switching
+            # accounts, the previous one stays in use until the login succeeds.
+            self._context = SessionContext(session_id, None, None, None)
 
-            self._manage_login_ui(login or _fallback_login_if_keyring_is_slow)
+        @threaded
+        def login_queried_callback(login: Login | None) -> None:
+            login = self._refresh_if_expiring(session_id, login)
+            self._manage_login_ui(previous_session_id, session_id, login)
 
         SessionManager.query_login(session_id, login_queried_callback)
 
-    def _manage_login_ui(self, login: Login) -> None:
-        if self._validate_login(login) is not None:
-            settings.props.current_session = SessionManager.get_session_id(self.get_account_info())
-            self.emit("login-completed")
-        else:
+    def _refresh_if_expiring(self, session_id: str, login: Login | None) -> Login | None:
+        """Hand an OAuth login over to the token refresher, refreshing it if it's about to expire.
+
+        Returns the login to use, or None if the refresh failed.
+        """
+        if not isinstance(login, OAuthLogin):
+            return login
+
+        login = self._token_refresher.adopt(session_id, login)
+        if login.expires_within(REFRESH_MARGIN) and not self._token_refresher.refresh(
+            session_id, login.access_token
+        ):
+            return None
+        return login
+
+    def _on_token_refreshed(self, session_id: str, login: OAuthLogin) -> None:
+        SessionManager.save_login(session_id, login)
+
+        with self._clients_lock:
+            gitlab_ = self._clients.get(session_id)
+
+        if gitlab_ is not None:
+            # Swap the token in place, so everything holding the client keeps working
+            gitlab_.oauth_token = login.access_token
+            gitlab_._set_auth_info()
+
+    def _manage_login_ui(
+        self, previous_session_id: str, session_id: str, login: Login | None
+    ) -> None:
+        gitlab_ = self._authenticate(login, session_id) if login is not None else None
+        if gitlab_ is None:
             self.emit("login-failed")
+            return
+
+        self._add_client(session_id, login, gitlab_)
+        self._complete_login(previous_session_id, session_id, gitlab_)
+
+    def _complete_login(
+        self, previous_session_id: str, session_id: str, gitlab_: gitlab.Gitlab
+    ) -> None:
+        if session_id != previous_session_id:
+            response_cache.invalidate(previous_session_id)
+
+        self._use_client(session_id, gitlab_)
+        settings.props.current_session = session_id
+        self.emit("login-completed")
+
+    def warm_up_sessions(self) -> None:
+        """Log in to every saved session in the background, so switching to them is instant.
+
+        Keyring lookups, token refreshes and validations all run concurrently.
+        """
+        for session_id in SessionManager.get_sessions():
+            with self._clients_lock:
+                if session_id in self._clients:
+                    continue
+
+            SessionManager.query_login(session_id, partial(self._warm_up_session, session_id))
+
+    def _warm_up_session(self, session_id: str, login: Login | None) -> None:
+        if login is not None:
+            run_in_thread(self._warm_up_client, session_id, login, priority=Priority.PREFETCH)
+
+    def _warm_up_client(self, session_id: str, login: Login) -> None:
+        login = self._refresh_if_expiring(session_id, login)
+        if login is None:
+            return
+
+        gitlab_ = self._authenticate(login, session_id)
+        if gitlab_ is not None:
+            # The session may have been started while this one was logging in, keep that client
+            self._add_client(session_id, login, gitlab_, replace=False)
 
     def remove_session(self, session_id: str) -> None:
-        self._gitlab = None
+        with self._clients_lock:
+            self._clients.pop(session_id, None)
+
+        self._token_refresher.forget(session_id)
+        self._context = NO_SESSION
+        response_cache.invalidate(session_id)
+        # The offline store is only ever touched from worker threads
+        run_in_thread(offline_store.delete_session, session_id)
         SessionManager.delete_session(session_id)
 
-    @cache
     def get_user_id(self, username: str) -> int:
-        return self._gitlab.users.list(username=username)[0].id
+        return self._context.users.get_id(username)
+
+    @retry_if_unauthorized
+    def get_user_page(self, username: str, *, context: SessionContext) -> UserPageData | None:
+        """Get everything `UserPage` shows, in a single request when GraphQL is available.
+
+        Returns None if there is no such user.
+        """
+        found_user, user = response_cache.get(context.session_id, "user", (username,))
+        found_projects, projects = response_cache.get(
+            context.session_id, "projects", (username, FIRST_PAGE)
+        )
+        if found_user and found_projects:
+            return UserPageData(user, projects)
+
+        variables = {"username": username, "first": PROJECTS_PER_PAGE}
+        data = context.graphql.query(USER_PAGE_QUERY, variables)
+        if data is None:
+            try:
+                user = self.get_user(username, context=context)
+            except UserNotFoundError:
+                return None
+            projects = self.get_projects_of_user(username, context=context)
+            self._store_user_page(context, user, projects)
+            return UserPageData(user, projects)
+
+        if data["user"] is None:
+            return None
+
+        user = User.from_graphql(data["user"], context.gitlab.url)
+        projects = self._get_projects_from_graphql(
+            data["user"]["namespace"]["projects"], context.gitlab.url
+        )
+
+        if self._is_current(context):
+            response_cache.put(context.session_id, "user", (username,), user)
+            response_cache.put(context.session_id, "projects", (username, FIRST_PAGE), projects)
+        self._store_user_page(context, user, projects)
+        return UserPageData(user, projects)
+
+    def prefetch_user(
+        self, username: str, callback: Callable[[UserPageData], None] | None = None
+    ) -> None:
+        """Fetch what `UserPage` shows at low priority, so it's cached by the time it's opened.
 
-    @cache
-    def get_user(self, username: str):
-        return self._gitlab.users.get(self.get_user_id(username))
+        `callback` is called on the main thread with the data, once it's there.
+        """
+        if username in self._prefetching or self._context.gitlab is None:
+            return
+
+        self._prefetching.add(username)
+        run_in_thread(
+            self._prefetch_user, username, self.context, callback, priority=Priority.PREFETCH
+        )
 
-    @cache
-    def get_projects_of_user(self, username: str):
-        return self._gitlab.users.get(self.get_user_id(username)).projects.list(iterator=True)
+    def _prefetch_user(
+        self, username: str, context: SessionContext, callback: Callable | None
+    ) -> None:
+        try:
+            data = self.get_user_page(username, context=context)
+        except Exception:
+            # Prefetching is only a hint, the page will report the error if it's opened
+            return
+        finally:
+            self._prefetching.discard(username)
+
+        if callback is not None and data is not None and self._is_current(context):
+            GLib.idle_add(callback, data)
+
+    def _store_user_page(
+        self, context: SessionContext, user: User, projects: tuple[list[Project], Any]
+    ) -> None:
+        if not self._is_current(context):
+            # The session was switched or removed while the page was loading
+            return
+
+        offline_store.save_user(context.session_id, user)
+        offline_store.save_projects_of_user(context.session_id, user.username, projects[0])
+
+    def get_cached_user_page(self, username: str) -> UserPageData | None:
+        """Get the last known `UserPage` data from memory, however stale."""
+        session_id = self.session_id
+        user = response_cache.peek(session_id, "user", (username,))
+        projects = response_cache.peek(session_id, "projects", (username, FIRST_PAGE))
+        if user is not None and projects is not None:
+            return UserPageData(user, projects)
+        return None
+
+    def get_stored_user_page(self, username: str) -> UserPageData | None:
+        """Get the `UserPage` data stored on disk, maybe in a previous run.
+
+        Reads the offline store, so it should be called from a worker thread.
+        """
+        session_id = self.session_id
+        user = offline_store.get_user(session_id, username)
+        if user is None:
+            return None
 
-    def get_account_info(self):
+        projects = offline_store.get_projects_of_user(session_id, username)
+        # The pages after the stored one are fetched from the start again
+        return UserPageData(user, (projects, None))
+
+    @cached_response("user")
+    @retry_if_unauthorized
+    def get_user(self, username: str, *, context: SessionContext) -> User:
+        return User.from_rest(context.users.get(username))
+
+    @cached_response("projects")
+    @retry_if_unauthorized
+    def get_projects_of_user(
+        self, username: str, cursor: Any = FIRST_PAGE, *, context: SessionContext
+    ) -> tuple[list[Project], Any]:
+        """Get a page of projects, and the cursor of the next page, or None on the last one."""
+        variables = {"username": username, "first": PROJECTS_PER_PAGE, "after": cursor or None}
+        data = context.graphql.query(USER_PROJECTS_QUERY, variables)
+        if data is not None:
+            if data["namespace"] is None:
+                return [], None
+            return self._get_projects_from_graphql(
+                data["namespace"]["projects"], context.gitlab.url
+            )
+
+        # /users/:id/projects accepts a username too, so no lookup is needed
+        page = cursor or 1
+        user = context.gitlab.users.get(username, lazy=True)
+        projects = user.projects.list(page=page, per_page=PROJECTS_PER_PAGE, get_all=False)
+        next_page = page + 1 if len(projects) == PROJECTS_PER_PAGE else None
+        return [Project.from_rest(project) for project in projects], next_page
+
+    @staticmethod
+    def _get_projects_from_graphql(
+        connection: dict, instance_url: str
+    ) -> tuple[list[Project], str | None]:
+        projects = [Project.from_graphql(node, instance_url) for node in connection["nodes"]]
+        page_info = connection["pageInfo"]
+        return projects, page_info["endCursor"] if page_info["hasNextPage"] else None
+
+    @retry_if_unauthorized
+    def get_events_since(
+        self, last_id: int | None, last_created_at: str | None, *, context: SessionContext
+    ) -> list[dict[str, Any]]:
+        """Get the events of the current user newer than `last_id`, newest first.
+
+        Without a known last event, only the first page is returned.
+        """
+        parameters = {"sort": "desc", "per_page": EVENTS_PER_PAGE}
+        if last_created_at:
+            # `after` only has a precision of days, and it's exclusive
+            day_before = date.fromisoformat(last_created_at[:10]) - timedelta(days=1)
+            parameters["after"] = day_before.isoformat()
+
+        events = []
+        for page in count(1):
+            batch = context.gitlab.events.list(page=page, get_all=False, **parameters)
+            for event in batch:
+                if last_id is not None and event.id <= last_id:
+                    return events
+                events.append(event.attributes)
+
+            if last_id is None or len(batch) < EVENTS_PER_PAGE:
+                return events
+
+    def get_account_info(self) -> AccountInfo:
+        if self._context.gitlab is None:
+            # Not logged in (yet), use what was saved with the session
+            return SessionManager.get_session_from_id(self.session_id)
+        return self._get_account_info(self._context.gitlab)
+
+    @staticmethod
+    def _get_account_info(gitlab_: gitlab.Gitlab) -> AccountInfo:
+        user = gitlab_.user
         return AccountInfo(
-            username=self._gitlab.user.username,
-            name=self._gitlab.user.name,
-            avatar_url=self._gitlab.user.avatar_url,
-            url=self._gitlab.url,
+            username=user.username, name=user.name, avatar_url=user.avatar_url, url=gitlab_.url
         )
 
 
@@ -0,0 +1,109 @@
+# session_registry.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+from collections import namedtuple
+
+from gi.repository import GLib, GObject
+
+from .settings import settings
+
+AccountInfo = namedtuple("AccountInfo", ["username", "name", "avatar_url", "url"])
+
+
+class SessionRegistry(GObject.Object):
+    """The saved accounts, stored per session in the `accounts` GSettings key.
+
+    Lookups are served from memory. Changes, whether made here or by another
+    instance, are announced per account, so listeners only have to touch the
+    entries that actually changed.
+    """
+
+    @GObject.Signal(arg_types=(str,))
+    def account_added(self, session_id: str): ...
+
+    @GObject.Signal(arg_types=(str,))
+    def account_removed(self, session_id: str): ...
+
+    @GObject.Signal(arg_types=(str,))
+    def account_changed(self, session_id: str): ...
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._migrate_json_sessions()
+
+        self._accounts: dict[str, AccountInfo] = {}
+        self._sync()
+        settings.connect("changed::accounts", self._sync)
+
+    def _migrate_json_sessions(self) -> None:
+        serialized_sessions = settings.get_string("sessions")
+        if serialized_sessions in ("", "{}"):
+            return
+
+        accounts = settings.get_value("accounts").unpack()
+        for session_id, account in json.loads(serialized_sessions).items():
+            accounts.setdefault(session_id, account)
+
+        self._write(accounts)
+        settings.reset("sessions")
+
+    def _write(self, accounts: dict[str, dict[str, str]]) -> None:
+        # Users without an avatar have None as avatar_url, which a{ss} can't hold
+        accounts = {
+            session_id: {key: value or "" for key, value in account.items()}
+            for session_id, account in accounts.items()
+        }
+        settings.set_value("accounts", GLib.Variant("a{sa{ss}}", accounts))
+
+    def _sync(self, *_) -> None:
+        stored = {
+            session_id: AccountInfo(**account)
+            for session_id, account in settings.get_value("accounts").unpack().items()
+        }
+
+        for session_id in [id for id in self._accounts if id not in stored]:
+            del self._accounts[session_id]
+            self.emit("account-removed", session_id)
+
+        for session_id, account_info in stored.items():
+            self._set(session_id, account_info)
+
+    def _set(self, session_id: str, account_info: AccountInfo) -> None:
+        previous = self._accounts.get(session_id)
+        if previous == account_info:
+            return
+
+        self._accounts[session_id] = account_info
+        self.emit("account-added" if previous is None else "account-changed", session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._accounts
+
+    def __iter__(self):
+        return iter(list(self._accounts))
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def get(self, session_id: str) -> AccountInfo | None:
+        return self._accounts.get(session_id)
+
+    def put(self, session_id: str, account_info: AccountInfo) -> None:
+        self._set(session_id, AccountInfo(*(value or "" for value in account_info)))
+        self._save()
+
+    def remove(self, session_id: str) -> None:
+        if self._accounts.pop(session_id, None) is not None:
+            self.emit("account-removed", session_id)
+            self._save()
+
+    def _save(self) -> None:
+        self._write(
+            {session_id: account._asdict() for session_id, account in self._accounts.items()}
+        )
+
+
+session_registry = SessionRegistry()
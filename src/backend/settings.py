@@ -9,7 +9,7 @@ from gi.repository import Gio, GObject
 
 class TanukiSettings(Gio.Settings):
     current_session = GObject.Property(type=str)
-    sessions = GObject.Property(type=str)
+    warm_up_sessions = GObject.Property(type=bool, default=True)
 
     def __init__(self):
         super().__init__("io.github.rdbende.Tanuki")
@@ -18,8 +18,8 @@ class TanukiSettings(Gio.Settings):
             setting, self, propetry, Gio.SettingsBindFlags.DEFAULT
         )
 
-        bind_settings("sessions", "sessions")
         bind_settings("current-session", "current-session")
+        bind_settings("warm-up-sessions", "warm-up-sessions")
 
 
 settings = TanukiSettings()
@@ -0,0 +1,111 @@
+# token_refresh.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Callable
+
+from gi.repository import GLib
+from tanuki.architecture import Priority, run_in_thread
+
+from .login import InvalidCredentialsError, OAuthLogin
+
+# Refresh access tokens this many seconds before they expire
+REFRESH_MARGIN = 5 * 60
+
+
+class TokenRefresher:
+    """Refreshes the OAuth access tokens of sessions shortly before they expire.
+
+    Refreshes are single-flight per session: if the timer and a request that
+    got a 401 both try to refresh the same token, only the first one reaches
+    the server, and the other one just uses the new token.
+    """
+
+    def __init__(self, on_refreshed: Callable[[str, OAuthLogin], None]) -> None:
+        self._on_refreshed = on_refreshed
+        self._lock = Lock()
+
+        # session id -> login, lock of its refreshes, timeout source id
+        self._logins: dict[str, OAuthLogin] = {}
+        self._refresh_locks: dict[str, Lock] = {}
+        self._timeouts: dict[str, int] = {}
+
+    def track(self, session_id: str, login: OAuthLogin) -> None:
+        with self._lock:
+            self._logins[session_id] = login
+            self._refresh_locks.setdefault(session_id, Lock())
+        self._schedule(session_id, login)
+
+    def adopt(self, session_id: str, login: OAuthLogin) -> OAuthLogin:
+        """Track `login`, unless the session has a tracked login already, and return that one.
+
+        Every keyring lookup gives a new login object. Refreshing more than one
+        of them would use a refresh token that the server has already rotated.
+        """
+        with self._lock:
+            tracked = self._logins.setdefault(session_id, login)
+            self._refresh_locks.setdefault(session_id, Lock())
+
+        if tracked is login:
+            self._schedule(session_id, login)
+        return tracked
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._logins.pop(session_id, None)
+            self._refresh_locks.pop(session_id, None)
+            if source_id := self._timeouts.pop(session_id, 0):
+                GLib.source_remove(source_id)
+
+    def _schedule(self, session_id: str, login: OAuthLogin) -> None:
+        with self._lock:
+            if source_id := self._timeouts.pop(session_id, 0):
+                GLib.source_remove(source_id)
+            if login.expires_at is None:
+                return
+
+            delay = max(0, int(login.expires_at - REFRESH_MARGIN - time.time()))
+            self._timeouts[session_id] = GLib.timeout_add_seconds(
+                delay, self._on_timeout, session_id
+            )
+
+    def _on_timeout(self, session_id: str) -> bool:
+        with self._lock:
+            self._timeouts.pop(session_id, None)
+            login = self._logins.get(session_id)
+
+        if login is not None:
+            run_in_thread(self.refresh, session_id, login.access_token, priority=Priority.PREFETCH)
+        return GLib.SOURCE_REMOVE
+
+    def refresh(self, session_id: str, stale_token: str | None) -> bool:
+        """Replace `stale_token` with a new one, unless that has happened already.
+
+        Returns whether there is a new token to retry with. Blocks on the
+        network, so it must be called from a worker thread.
+        """
+        with self._lock:
+            login = self._logins.get(session_id)
+            refresh_lock = self._refresh_locks.get(session_id)
+
+        if login is None:
+            return False
+
+        with refresh_lock:
+            if login.access_token != stale_token:
+                return True
+
+            try:
+                login.refresh_access_token()
+            except (InvalidCredentialsError, OSError):
+                return False
+
+            self._on_refreshed(session_id, login)
+
+        self._schedule(session_id, login)
+        return True
@@ -0,0 +1,69 @@
+# user_resolver.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import gitlab
+    from gitlab.base import RESTObject
+
+
+class UserNotFoundError(Exception): ...
+
+
+class UserResolver:
+    """Resolves usernames to user objects with as few round trips as possible.
+
+    Keeps a username → id → user index for one authenticated client, so a
+    user is looked up by username at most once per session.
+    """
+
+    def __init__(self, gitlab_: gitlab.Gitlab) -> None:
+        self._gitlab = gitlab_
+        self._ids: dict[str, int] = {}
+        self._users: dict[int, RESTObject] = {}
+        self._lock = Lock()
+
+        if gitlab_.user is not None:
+            self._index(gitlab_.user)
+
+    def _index(self, user: RESTObject) -> RESTObject:
+        with self._lock:
+            self._ids[user.username] = user.id
+            self._users[user.id] = user
+        return user
+
+    def get_id(self, username: str) -> int:
+        with self._lock:
+            if username in self._ids:
+                return self._ids[username]
+
+        return self._index(self._find(username)).id
+
+    def _find(self, username: str) -> RESTObject:
+        users = self._gitlab.users.list(username=username)
+        if not users:
+            raise UserNotFoundError(username)
+        return users[0]
+
+    def get(self, username: str) -> RESTObject:
+        if self._gitlab.user is not None and username == self._gitlab.user.username:
+            # Already fetched in full by gitlab.auth()
+            return self._gitlab.user
+
+        with self._lock:
+            user_id = self._ids.get(username)
+
+        if user_id is None:
+            user = self._find(username)
+            # Admins get the full user object from the list endpoint already
+            if hasattr(user, "bio"):
+                return self._index(user)
+            user_id = self._index(user).id
+
+        return self._index(self._gitlab.users.get(user_id))
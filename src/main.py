@@ -4,11 +4,11 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 from __future__ import annotations
 
+import os
 import sys
 
 from gi.repository import Adw, Gio, GLib
-from tanuki import APP_ID, APP_ICON
-from tanuki.backend import OAuthLoginManager
+from tanuki import APP_ICON, APP_ID, PKGDATADIR, startup_report
 
 
 class TanukiApplication(Adw.Application):
@@ -21,23 +21,46 @@ class TanukiApplication(Adw.Application):
             "add_new_account", self.on_add_new_account, parameter_type=GLib.VariantType("b")
         )
         self.create_action("about", self.on_about_action, ["F1"])
+        self.create_action(
+            "oauth-callback", self.on_oauth_callback, parameter_type=GLib.VariantType("s")
+        )
+
+    def do_startup(self):
+        # Only the primary instance needs the resources, not one that just forwards a request
+        Gio.Resource.load(os.path.join(PKGDATADIR, f"{APP_ID}.gresource"))._register()
+        startup_report.mark("resources loaded")
+        Adw.Application.do_startup(self)
 
     def do_open(self, files: list[Gio.File], *_):
-        uri = GLib.Uri.parse(files[0].get_uri(), GLib.UriFlags.NONE)
-        if uri.get_scheme() == "tanuki":
-            query = uri.get_query()
-            if query:
-                uri_params = GLib.Uri.parse_params(
-                    uri.get_query(), -1, "&", GLib.UriParamsFlags.NONE
-                )
-
-                if "code" in uri_params and "state" in uri_params:
-                    OAuthLoginManager.redirect(uri_params.get("state"), uri_params.get("code"))
-                elif uri_params.get("error", "") == "access_denied":
-                    OAuthLoginManager.access_denied(uri_params.get("state"))
+        uri = files[0].get_uri()
+        if GLib.Uri.peek_scheme(uri) == "tanuki":
+            # Start the token exchange before the window is built, if it isn't yet
+            self.activate_action("oauth-callback", GLib.Variant.new_string(uri))
 
         self.do_activate()
 
+    def on_oauth_callback(self, _, value):
+        # Bring back the window from behind the browser, when activated remotely
+        if win := self.props.active_window:
+            win.present()
+
+        try:
+            uri = GLib.Uri.parse(value.get_string(), GLib.UriFlags.NONE)
+        except GLib.Error:
+            return
+
+        query = uri.get_query()
+        if not query:
+            return
+
+        from tanuki.backend import OAuthLoginManager
+
+        uri_params = GLib.Uri.parse_params(query, -1, "&", GLib.UriParamsFlags.NONE)
+        if "code" in uri_params and "state" in uri_params:
+            OAuthLoginManager.redirect(uri_params.get("state"), uri_params.get("code"))
+        elif uri_params.get("error", "") == "access_denied":
+            OAuthLoginManager.access_denied(uri_params.get("state"))
+
     def do_activate(self):
         """Called when the application is activated.
 
@@ -49,9 +72,13 @@ class TanukiApplication(Adw.Application):
         if not win:
             from tanuki.window import MainWindow
 
+            startup_report.mark("window module imported")
             win = MainWindow(application=self)
-
-        win.present()
+            startup_report.mark("main window built")
+            win.present()
+            startup_report.report_after_first_frame(win)
+        else:
+            win.present()
 
     def on_about_action(self, widget, _):
         """Callback for the app.about action."""
@@ -105,4 +132,14 @@ def main():
     """The application's entry point."""
     global app
     app = TanukiApplication()
+
+    uri = next((arg for arg in sys.argv[1:] if GLib.Uri.peek_scheme(arg) == "tanuki"), None)
+    if uri is not None:
+        app.register(None)
+        if app.get_is_remote():
+            # Hand the callback over to the running instance, without any UI of our own
+            app.activate_action("oauth-callback", GLib.Variant.new_string(uri))
+            app.get_dbus_connection().flush_sync(None)
+            return 0
+
     return app.run(sys.argv)
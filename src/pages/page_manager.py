@@ -3,21 +3,128 @@
 # SPDX-FileCopyrightText: 2024  Benedek Dévényi
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from __future__ import annotations
 
-from gi.repository import Adw, GObject
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from gi.repository import Adw, GObject, Gtk
+from tanuki.architecture import cancel_async_jobs
+from tanuki.backend import session
 from tanuki.main import get_main_window
 
+# (page type, arguments the page was created with)
+PageKey = tuple[type, tuple[Hashable, ...]]
+
 
 class PageManager(GObject.Object):
     __gtype_name__ = "PageManager"
 
+    # Recently visited pages, kept with their widgets and loaded data for going back to them
+    MAX_CACHED_PAGES = 8
+    _pages: OrderedDict[PageKey, Adw.NavigationPage] = OrderedDict()
+    _login_handler = 0
+
     @classmethod
     def add_page(cls, page: Adw.Bin) -> None:
+        get_main_window().navigation_view.push(cls._wrap_page(page))
+
+    @classmethod
+    def open_page(cls, page_type: type[Adw.Bin], *args: Hashable) -> None:
+        """Show a `page_type(*args)` page, reusing it if it was visited recently."""
+        key = (page_type, args)
+        navigation_view = get_main_window().navigation_view
+
+        if not cls._login_handler:
+            # Cached pages show the data of the account they were opened with
+            cls._login_handler = session.connect("login-started", lambda *_: cls.forget_pages())
+
+        nav_page = cls._pages.get(key)
+        if nav_page is None:
+            nav_page = cls._pages[key] = cls._wrap_page(page_type(*args))
+        cls._pages.move_to_end(key)
+
+        if cls._is_in_stack(navigation_view, nav_page):
+            if navigation_view.get_visible_page() is not nav_page:
+                navigation_view.pop_to_page(nav_page)
+        else:
+            navigation_view.push(nav_page)
+
+        cls._evict(navigation_view)
+
+    @classmethod
+    def prefetch(cls, widget: Gtk.Widget, page_type: type[Adw.Bin], *args: Hashable) -> None:
+        """Load the data of a `page_type(*args)` page in the background, unless it's cached."""
+        if (page_type, args) not in cls._pages:
+            page_type.prefetch(*args, scale_factor=widget.get_scale_factor())
+
+    @classmethod
+    def prefetch_on_intent(
+        cls,
+        widget: Gtk.Widget,
+        page_type: type[Adw.Bin],
+        get_args: Callable[[], tuple[Hashable, ...] | None],
+    ) -> None:
+        """Prefetch a page when `widget` is hovered, focused or scrolled into view.
+
+        `get_args` returns the arguments of the page at that moment, or None to skip it.
+        """
+
+        def on_intent(*_) -> None:
+            if (args := get_args()) is not None:
+                cls.prefetch(widget, page_type, *args)
+
+        motion_controller = Gtk.EventControllerMotion()
+        motion_controller.connect("enter", on_intent)
+        widget.add_controller(motion_controller)
+
+        focus_controller = Gtk.EventControllerFocus()
+        focus_controller.connect("enter", on_intent)
+        widget.add_controller(focus_controller)
+
+        widget.connect("map", on_intent)
+
+    @classmethod
+    def forget_pages(cls) -> None:
+        """Drop every cached page, releasing the ones that aren't on the navigation stack."""
+        navigation_view = get_main_window().navigation_view
+        for nav_page in cls._pages.values():
+            if not cls._is_in_stack(navigation_view, nav_page):
+                cls._release(navigation_view, nav_page)
+        cls._pages.clear()
+
+    @staticmethod
+    def _wrap_page(page: Adw.Bin) -> Adw.NavigationPage:
         nav_page = Adw.NavigationPage(title="Page")
         toolbar_view = Adw.ToolbarView()
         toolbar_view.set_content(page)
         toolbar_view.add_top_bar(Adw.HeaderBar())
         nav_page.set_child(toolbar_view)
-        get_main_window().navigation_view.push(nav_page)
+        return nav_page
+
+    @staticmethod
+    def _is_in_stack(navigation_view: Adw.NavigationView, nav_page: Adw.NavigationPage) -> bool:
+        return any(page is nav_page for page in navigation_view.get_navigation_stack())
+
+    @classmethod
+    def _evict(cls, navigation_view: Adw.NavigationView) -> None:
+        for key in list(cls._pages):
+            if len(cls._pages) <= cls.MAX_CACHED_PAGES:
+                break
+
+            # Pages still on the stack are in use, those are kept a bit longer
+            if not cls._is_in_stack(navigation_view, cls._pages[key]):
+                cls._release(navigation_view, cls._pages.pop(key))
+
+    @staticmethod
+    def _release(navigation_view: Adw.NavigationView, nav_page: Adw.NavigationPage) -> None:
+        # GTK disposes the page once the last reference is gone. Its jobs don't keep it
+        # alive, but there's no point in letting them finish until then
+        page = nav_page.get_child().get_content()
+        cancel_async_jobs(page)
+        if (release := getattr(page, "release", None)) is not None:
+            release()
+        if nav_page.get_parent() is navigation_view:
+            navigation_view.remove(nav_page)
 
     def go_back_home(): ...
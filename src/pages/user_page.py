@@ -4,10 +4,14 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 
+from functools import partial
+
 from gi.repository import Adw, GObject, Gtk
-from gitlab.base import RESTObject
-from tanuki.architecture import RemoteImage, async_job_finished
-from tanuki.backend import session
+from tanuki.architecture import PaginatedListModel, Priority, RemoteImage, StaleWhileRevalidate
+from tanuki.architecture.remote_content import RemoteImages, get_size_bucket
+from tanuki.backend import Project, UserPageData, session
+
+AVATAR_SIZE = 128  # the icon size of Adw.StatusPage
 
 
 @Gtk.Template(resource_path="/io/github/rdbende/Tanuki/pages/user.ui")
@@ -19,21 +23,56 @@ class UserPage(Adw.Bin):
     avatar_url = GObject.Property(type=str)
 
     status_page: Adw.StatusPage = Gtk.Template.Child()
+    projects_list: Gtk.ListView = Gtk.Template.Child()
 
     def __init__(self, username: str):
         super().__init__()
-        self.set_user_data(session.get_user, username)
-        self.set_user_projects(session.get_projects_of_user, username)
+        self._username = username
+        self._projects_page = None
 
-        self.remote_image = RemoteImage(self, "avatar-url")
+        self.remote_image = RemoteImage(self, "avatar-url", size=AVATAR_SIZE)
         self.remote_image.bind_to(self.status_page, "paintable")
+        self.connect("notify::scale-factor", self.update_image_size)
+
+        self.data = StaleWhileRevalidate(
+            self,
+            {"avatar-url": "user.avatar_url", "username": "user.name", "bio": "user.bio"},
+            get_cached=partial(session.get_cached_user_page, username),
+            fetch=partial(session.get_user_page, username),
+            get_stored=partial(session.get_stored_user_page, username),
+        )
+        self.data.connect("updated", self.update_projects)
+        self.data.start()
+
+    @classmethod
+    def prefetch(cls, username: str, scale_factor: int = 1) -> None:
+        """Load the data and avatar of the page in the background, before it's opened."""
+
+        def prefetch_avatar(data: UserPageData) -> None:
+            if data.user.avatar_url:
+                key = (data.user.avatar_url, get_size_bucket(AVATAR_SIZE * scale_factor))
+                RemoteImages.request(key, lambda _: None, priority=Priority.PREFETCH)
+
+        session.prefetch_user(username, prefetch_avatar)
+
+    def release(self) -> None:
+        """Stop loading anything, the page won't be shown again."""
+        self.data.cancel()
+        self.remote_image.release()
+        if self._projects_page is not None:
+            self.projects.cancel()
+
+    def update_image_size(self, *_) -> None:
+        self.remote_image.props.size = AVATAR_SIZE * self.get_scale_factor()
 
-    @async_job_finished
-    def set_user_data(self, model: RESTObject) -> None:
-        self.avatar_url = model.avatar_url
-        self.username = model.name
-        self.bio = model.bio
+    def update_projects(self, _, data: UserPageData) -> None:
+        projects, next_cursor = data.projects
+        page = ([project.to_dict() for project in projects], next_cursor)
+        if page == self._projects_page:
+            return
 
-    @async_job_finished
-    def set_user_projects(self, model: RESTObject) -> None:
-        print(model)
+        self._projects_page = page
+        self.projects = PaginatedListModel(
+            Project, partial(session.get_projects_of_user, self._username), first_page=data.projects
+        )
+        self.projects_list.set_model(Gtk.NoSelection(model=self.projects))
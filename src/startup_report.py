@@ -0,0 +1,81 @@
+# startup_report.py
+#
+# SPDX-FileCopyrightText: 2024  Benedek Dévényi
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Startup timing report, printed to stderr when TANUKI_STARTUP_REPORT is set.
+
+Lists how long each module took to import, in the style of `python -X importtime`,
+along with the time it took to get the first frame of the main window on screen.
+"""
+
+import builtins
+import os
+import sys
+import threading
+import time
+
+enabled = bool(os.environ.get("TANUKI_STARTUP_REPORT"))
+
+_start = time.perf_counter()
+_original_import = builtins.__import__
+_state = threading.local()
+# (nesting depth, module name, cumulative import time in seconds)
+_imports: list[tuple[int, str, float]] = []
+_marks: list[tuple[str, float]] = []
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    depth = getattr(_state, "depth", 0)
+    n_modules = len(sys.modules)
+    _state.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _state.depth = depth
+        if len(sys.modules) != n_modules:
+            if level:
+                name = f"{(globals or {}).get('__package__', '')}.{name}".rstrip(".")
+            _imports.append((depth, name, time.perf_counter() - start))
+
+
+def install() -> None:
+    """Start timing imports, if the report is enabled."""
+    if enabled:
+        builtins.__import__ = _timed_import
+
+
+def mark(label: str) -> None:
+    """Record that startup reached `label`."""
+    if enabled:
+        _marks.append((label, time.perf_counter() - _start))
+
+
+def report_after_first_frame(window) -> None:
+    """Print the report once `window` has painted its first frame."""
+    if not enabled:
+        return
+
+    frame_clock = window.get_frame_clock()
+
+    def after_paint(*_) -> None:
+        frame_clock.disconnect(handler)
+        mark("first frame")
+        _print_report()
+
+    handler = frame_clock.connect("after-paint", after_paint)
+
+
+def _print_report() -> None:
+    builtins.__import__ = _original_import
+
+    print("import time: cumulative [ms] | imported package", file=sys.stderr)
+    for depth, name, duration in _imports:
+        print(f"import time: {duration * 1000:15.1f} | {'  ' * depth}{name}", file=sys.stderr)
+
+    for label, elapsed in _marks:
+        print(f"startup: {label} after {elapsed * 1000:.1f} ms", file=sys.stderr)
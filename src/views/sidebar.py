@@ -7,7 +7,7 @@ from typing import Callable
 
 from gi.repository import Adw, Gio, GObject, Gtk
 from tanuki.architecture import RemoteImage
-from tanuki.backend import SessionManager, session, settings
+from tanuki.backend import AccountInfo, SessionManager, session, session_registry, settings
 
 
 class AvatarButton(Adw.Bin):
@@ -15,6 +15,8 @@ class AvatarButton(Adw.Bin):
 
     avatar_url = GObject.Property(type=str)
     size = GObject.Property(type=int)
+    # Load the image at least this large, so switching between sizes reuses the same texture
+    image_size = GObject.Property(type=int)
     text = GObject.Property(type=str)
 
     def __init__(self) -> None:
@@ -26,10 +28,36 @@ class AvatarButton(Adw.Bin):
 
         self.remote_image = RemoteImage(self, "avatar-url")
         self.remote_image.bind_to(self.avatar, "custom-image")
+        self.connect("notify::size", self.update_image_size)
+        self.connect("notify::image-size", self.update_image_size)
+        self.connect("notify::scale-factor", self.update_image_size)
         self.bind_property("size", self.avatar, "size")
         self.bind_property("text", self.avatar, "text")
         self.bind_property("text", self, "tooltip-text")
 
+    def update_image_size(self, *_) -> None:
+        size = max(self.props.size, self.props.image_size)
+        self.remote_image.props.size = size * self.get_scale_factor()
+
+
+class AccountItem(GObject.Object):
+    __gtype_name__ = "AccountItem"
+
+    session_id = GObject.Property(type=str)
+    display_name = GObject.Property(type=str)
+    username = GObject.Property(type=str)
+    avatar_url = GObject.Property(type=str)
+
+    def update(self, account_info: AccountInfo) -> None:
+        """Set the properties that changed, so rows only redraw (and refetch) what they must."""
+        for prop, value in (
+            ("display_name", account_info.name),
+            ("username", account_info.username),
+            ("avatar_url", account_info.avatar_url),
+        ):
+            if self.get_property(prop) != value:
+                self.set_property(prop, value)
+
 
 @Gtk.Template(resource_path="/io/github/rdbende/Tanuki/views/sidebar/account_row.ui")
 class AccountRow(Adw.ActionRow):
@@ -41,18 +69,24 @@ class AccountRow(Adw.ActionRow):
 
     avatar: AvatarButton = Gtk.Template.Child()
 
-    def __init__(self, username: str, display_name: str, avatar_url: str, session_id: str) -> None:
+    SELECTED_AVATAR_SIZE = 38
+    UNSELECTED_AVATAR_SIZE = 42
+
+    def __init__(self, item: AccountItem) -> None:
         super().__init__()
         self.connect("activated", self.switch_account)
 
-        self._session_id = session_id
+        self._session_id = item.props.session_id
+        # Adw.Avatar scales the larger image down when the row is selected
+        self.avatar.props.image_size = self.UNSELECTED_AVATAR_SIZE
 
-        self.props.display_name = display_name
-        self.props.username = username
-        self.props.avatar_url = avatar_url
+        for prop in ("display-name", "username", "avatar-url"):
+            item.bind_property(prop, self, prop, GObject.BindingFlags.SYNC_CREATE)
 
     def set_avatar_size(self):
-        self.avatar.props.size = 38 if self.is_selected() else 42
+        self.avatar.props.size = (
+            self.SELECTED_AVATAR_SIZE if self.is_selected() else self.UNSELECTED_AVATAR_SIZE
+        )
 
     def switch_account(self, *_) -> None:
         session.start_session(self._session_id)
@@ -72,15 +106,22 @@ class AccountChooser(Gtk.MenuButton):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        settings.connect("changed::sessions", self.reload_account_list)
         settings.connect("changed::current-session", self.set_active_account)
         session.connect("login-started", lambda *_: self.set_sensitive(False))
         session.connect("login-completed", lambda *_: self.set_sensitive(True))
         session.connect("login-failed", lambda *_: self.set_sensitive(True))
         self.accounts.connect("selected-rows-changed", self.set_avatar_sizes)
 
-        self._rows = {}
-        self.reload_account_list()
+        self._items: dict[str, AccountItem] = {}
+        self._model = Gio.ListStore(item_type=AccountItem)
+        self.accounts.bind_model(self._model, AccountRow)
+
+        for session_id in session_registry:
+            self.add_account(session_registry, session_id)
+
+        session_registry.connect("account-added", self.add_account)
+        session_registry.connect("account-removed", self.remove_account)
+        session_registry.connect("account-changed", self.update_account)
 
     def set_avatar_sizes(self, *_):
         row = self.accounts.get_first_child()
@@ -92,24 +133,27 @@ class AccountChooser(Gtk.MenuButton):
         session = obj.get_property(setting)
         if session:
             self.avatar.props.avatar_url = SessionManager.get_session_from_id(session).avatar_url
-            self.accounts.select_row(self._rows[session])
+            found, position = self._model.find(self._items[session])
+            if found:
+                self.accounts.select_row(self.accounts.get_row_at_index(position))
         else:
             self.avatar.props.avatar_url = ""
 
-    def reload_account_list(self, *_):
-        self.accounts.remove_all()
-        self._rows.clear()
+    def add_account(self, registry: GObject.Object, session_id: str) -> None:
+        item = self._items[session_id] = AccountItem(session_id=session_id)
+        item.update(registry.get(session_id))
+        self._model.append(item)
+
+    def remove_account(self, _registry: GObject.Object, session_id: str) -> None:
+        if (item := self._items.pop(session_id, None)) is None:
+            return
 
-        for id, account in SessionManager.get_sessions().items():
-            row = AccountRow(
-                username=account["username"],
-                display_name=account["name"],
-                avatar_url=account["avatar_url"],
-                session_id=id,
-            )
+        found, position = self._model.find(item)
+        if found:
+            self._model.remove(position)
 
-            self.accounts.append(row)
-            self._rows[id] = row
+    def update_account(self, registry: GObject.Object, session_id: str) -> None:
+        self._items[session_id].update(registry.get(session_id))
 
 
 @Gtk.Template(resource_path="/io/github/rdbende/Tanuki/views/sidebar/item.ui")
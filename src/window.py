@@ -5,8 +5,7 @@
 
 
 from gi.repository import Adw, Gio, GLib, GObject, Gtk
-from tanuki.backend import session, settings
-from tanuki.pages import PageManager, UserPage
+from tanuki.backend import SessionManager, activity_poller, session, settings
 from tanuki.views.sidebar import Sidebar, SidebarItem
 
 
@@ -16,6 +15,7 @@ class MainWindow(Adw.ApplicationWindow):
 
     sidebar: Sidebar = Gtk.Template.Child()
     home_stack: Adw.ViewStack = Gtk.Template.Child()
+    activity_page: Adw.ViewStackPage = Gtk.Template.Child()
     navigation_view: Adw.NavigationView = Gtk.Template.Child()
 
     loading_stack: Gtk.Stack = Gtk.Template.Child()
@@ -23,20 +23,28 @@ class MainWindow(Adw.ApplicationWindow):
     logging_in_spinner: Gtk.Spinner = Gtk.Template.Child()
 
     primary_menu: Gio.MenuModel = Gtk.Template.Child()
+    open_profile_button: Gtk.Button = Gtk.Template.Child()
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         self.setup_components()
+        self.setup_activity_polling()
 
         session.connect("login-started", self.show_loading_spinner)
         session.connect("login-completed", self.hide_loading_spinner)
+        session.connect("login-failed", self.on_login_failed)
+        self._warm_up_handler = session.connect("login-completed", self.warm_up_sessions)
+        self._prefetch_handler = session.connect("login-completed", self.set_up_prefetching)
+
+        # Start reading every saved login at once, the session start below waits for it
+        SessionManager.prefetch_secrets()
 
         current_session = settings.props.current_session
         if not current_session:
             self.set_up_account()
         else:
-            session.start_session(current_session, refresh_oauth_token=True)
+            session.start_session(current_session)
 
         settings.connect(
             "changed::current-session",
@@ -51,9 +59,36 @@ class MainWindow(Adw.ApplicationWindow):
         self.loading_stack.set_visible_child(self.home_stack)
         self.logging_in_spinner.set_spinning(False)
 
+    def on_login_failed(self, *_) -> None:
+        # After a failed account switch the previous account is still in use,
+        # and offline, what was stored of the session can still be browsed
+        if session.session_id:
+            GLib.idle_add(self.hide_loading_spinner)
+
+    def warm_up_sessions(self, *_) -> None:
+        session.disconnect(self._warm_up_handler)
+        if settings.props.warm_up_sessions:
+            # Login signals may be emitted from a worker thread
+            GLib.idle_add(session.warm_up_sessions, priority=GLib.PRIORITY_LOW)
+
+    def set_up_prefetching(self, *_) -> None:
+        session.disconnect(self._prefetch_handler)
+        # Login signals may be emitted from a worker thread
+        GLib.idle_add(self._set_up_prefetching)
+
+    def _set_up_prefetching(self) -> None:
+        from tanuki.pages import PageManager, UserPage
+
+        def get_own_username() -> tuple[str] | None:
+            return (session.get_account_info().username,) if session.session_id else None
+
+        PageManager.prefetch_on_intent(self.open_profile_button, UserPage, get_own_username)
+
     @Gtk.Template.Callback()
     def user_own_profile(self, *_):
-        PageManager.add_page(UserPage(session.get_account_info().username))
+        from tanuki.pages import PageManager, UserPage
+
+        PageManager.open_page(UserPage, session.get_account_info().username)
 
     def set_up_account(self, *_) -> None:
         self.get_application().activate_action("add_new_account", GLib.Variant.new_boolean(True))
@@ -64,6 +99,24 @@ class MainWindow(Adw.ApplicationWindow):
         for page in self.home_stack.get_pages():
             self.add_sidebar_item_for_view_stack_page(page)
 
+    def setup_activity_polling(self) -> None:
+        activity_poller.bind_property(
+            "unread-count", self.activity_page, "badge-number", GObject.BindingFlags.SYNC_CREATE
+        )
+        self.home_stack.connect("notify::visible-child", self.mark_activity_read)
+        activity_poller.connect("notify::unread-count", self.mark_activity_read)
+
+        # Minimized or hidden windows are suspended, nobody sees the badge then
+        for property in ("suspended", "visible"):
+            self.connect(f"notify::{property}", self.update_activity_poller)
+
+    def mark_activity_read(self, *_) -> None:
+        if self.home_stack.get_visible_child_name() == "activity_page" and self.is_visible():
+            activity_poller.mark_read()
+
+    def update_activity_poller(self, *_) -> None:
+        activity_poller.props.active = self.is_visible() and not self.props.suspended
+
     def add_sidebar_item_for_view_stack_page(self, page: Adw.ViewStackPage) -> None:
         item = SidebarItem()
 